@@ -2,6 +2,8 @@
 PORTNET Incident Resolver - Streamlit Web Application
 Main entry point for the web interface
 """
+import logging
+import os
 import sys
 from pathlib import Path
 import streamlit as st
@@ -12,9 +14,14 @@ SRC_DIR = Path(__file__).parent / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
-from analyzers import IncidentParser, ContextGatherer, AIAnalyzer
 from utils.config import validate_files, validate_azure_config
 
+# Analyzer progress goes through logging; LOG_LEVEL=DEBUG shows every stage
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+
 # Page configuration
 st.set_page_config(
     page_title="PORTNET Incident Resolver",
@@ -23,8 +30,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS (module constant, built once per process)
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -75,25 +82,165 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+
+# st.fragment (>= 1.37) / st.experimental_fragment (1.33 - 1.36); plain function on older releases
+_fragment_decorator = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+FRAGMENTS_SUPPORTED = _fragment_decorator is not None
+fragment = _fragment_decorator or (lambda func: func)
+
+
+# Severity badge shown in the incident summary
+_SEVERITY_ICON = {
+    'LOW': '🟢',
+    'MEDIUM': '🟡',
+    'HIGH': '🟠',
+    'CRITICAL': '🔴'
+}
+
+# Sample incidents offered in the sidebar
+SAMPLES = {
+    'Test Case 1: Duplicate Container': """RE: Email ALR-861600 | CMAU0000020 - Duplicate Container information received
+
+To: Ops Team Duty; Jen
+Cc: Customer Service
+
+Hi Jen,
+
+Please assist in checking container CMAU0000020. Customer on PORTNET is seeing 2 identical containers information.
+
+Thanks.
+Regards,
+Kenny""",
+    'Test Case 2: Vessel Error': """RE: Email ALR-861631 | VESSEL_ERR_4 - System Vessel Name has been used by other vessel advice
+
+To: Ops Team Duty; Vedu
+Cc: Customer Service
+
+Hi Vedu,
+
+Customer reported that they were unable to create vessel advice for MV Lion City 07 and hit error VESSEL_ERR_4. The local vessel name had been used by other vessel advice.
+
+Please assist, thanks.
+Regards,
+Jia Xuan""",
+    'Test Case 3: EDI Stuck': """Alert: SMS INC-154599
+
+Issue: EDI message REF-IFT-0007 stuck in ERROR status (Sender: LINE-PSA, Recipient: PSA-TOS, State: No acknowledgment sent, ack_at is NULL).""",
+}
+
+# Placeholder option meaning "no sample selected"
+NO_SAMPLE = '—'
+
+
+# Session state keys holding the results of the last analysis
+RESULT_KEYS = ('parsed_incident', 'context', 'analysis', 'remediation', 'escalation_l3', 'escalation_mgmt')
 
 
 def initialize_session_state():
-    """Initialize session state variables"""
-    if 'parsed_incident' not in st.session_state:
-        st.session_state.parsed_incident = None
-    if 'context' not in st.session_state:
-        st.session_state.context = None
-    if 'analysis' not in st.session_state:
-        st.session_state.analysis = None
-    if 'remediation' not in st.session_state:
-        st.session_state.remediation = None
-    if 'escalation_l3' not in st.session_state:
-        st.session_state.escalation_l3 = None
-    if 'escalation_mgmt' not in st.session_state:
-        st.session_state.escalation_mgmt = None
-    if 'analysis_complete' not in st.session_state:
-        st.session_state.analysis_complete = False
+    """Initialize session state variables (only on the first run of a session)"""
+    if st.session_state.get('_init_done'):
+        return
+    for key in RESULT_KEYS:
+        st.session_state.setdefault(key, None)
+    st.session_state.setdefault('analysis_complete', False)
+    st.session_state.setdefault('analysis_ts', None)
+    st.session_state._init_done = True
+
+
+def clear_incident():
+    """Reset the incident input and analysis results (Clear button callback)"""
+    for key in RESULT_KEYS:
+        st.session_state[key] = None
+    st.session_state.analysis_complete = False
+    st.session_state.sample_incident = ''
+    st.session_state.sample_choice = NO_SAMPLE
+    # Drop the text area's widget state so it re-renders empty
+    st.session_state.pop('incident_text', None)
+    st.session_state.results_cleared = True
+
+
+def load_sample():
+    """Copy the selected sample into the incident input (selectbox callback)"""
+    choice = st.session_state.sample_choice
+    if choice != NO_SAMPLE:
+        st.session_state.sample_incident = SAMPLES[choice]
+        st.session_state.pop('incident_text', None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_parser():
+    """Shared IncidentParser instance (built once per process)"""
+    from analyzers.incident_parser import IncidentParser
+    return IncidentParser()
+
+
+@st.cache_resource(show_spinner=False)
+def get_gatherer():
+    """Shared ContextGatherer instance (loads all data sources once per process)"""
+    from analyzers.context_gatherer import ContextGatherer
+    return ContextGatherer()
+
+
+@st.cache_resource(show_spinner=False)
+def get_analyzer():
+    """Shared AIAnalyzer instance (reuses one Azure OpenAI client)"""
+    from analyzers.ai_analyzer import AIAnalyzer
+    return AIAnalyzer()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _parse(incident_text):
+    """Parse incident text (cached on the raw text)"""
+    return get_parser().parse(incident_text)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _gather(parsed):
+    """Gather context for a parsed incident (cached on the parsed incident)"""
+    return get_gatherer().gather(parsed)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def run_pipeline(incident_text):
+    """
+    Run the full analysis pipeline for an incident (cached on the raw text)
+    
+    Args:
+        incident_text: Raw incident report text
+        
+    Returns:
+        Dictionary keyed like RESULT_KEYS
+        
+    Raises:
+        RuntimeError: If an AI call failed (the result is then not cached)
+    """
+    parsed = _parse(incident_text)
+    context = _gather(parsed)
+    
+    analyzer = get_analyzer()
+    result = analyzer.resolve_incident(parsed, context)
+    
+    # Raise rather than return failed AI calls, so st.cache_data doesn't replay them
+    for text in (
+        result['analysis'].get('full_response', ''),
+        result['remediation'].get('full_response', ''),
+        result['escalation_l3'],
+        result['escalation_mgmt']
+    ):
+        if analyzer.is_error_response(text):
+            raise RuntimeError(text)
+    
+    return {
+        'parsed_incident': parsed,
+        'context': context,
+        'analysis': result['analysis'],
+        'remediation': result['remediation'],
+        'escalation_l3': result['escalation_l3'],
+        'escalation_mgmt': result['escalation_mgmt']
+    }
 
 
 def validate_system():
@@ -106,6 +253,237 @@ def validate_system():
         return False, f"❌ Validation failed: {str(e)}"
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def validate_system_cached():
+    """Validate system configuration at most once every 5 minutes"""
+    return validate_system()
+
+
+def _show_analysis_success():
+    """Announce a finished analysis"""
+    st.success("🎉 Analysis completed successfully! View results in the tabs above.")
+    st.balloons()
+
+
+@fragment
+def _incident_input_fragment():
+    """Incident input panel - reruns on its own without rebuilding the sidebar or result tabs"""
+    st.header("Incident Details")
+    
+    if st.session_state.pop('analysis_just_completed', False):
+        _show_analysis_success()
+    
+    if st.session_state.pop('results_cleared', False) and FRAGMENTS_SUPPORTED:
+        # Clear only reran this fragment - rerun the app so the result tabs empty too
+        st.rerun()
+    
+    # Check if sample incident loaded
+    default_text = st.session_state.get('sample_incident', '')
+    
+    # Form defers the rerun to submission, so typing doesn't rerun the script
+    with st.form("incident_form", clear_on_submit=False):
+        incident_text = st.text_area(
+            "Paste incident report (email, SMS, or call details):",
+            value=default_text,
+            height=300,
+            key="incident_text",
+            placeholder="Paste the incident details here...\n\nExample:\nRE: Email ALR-861600 | CMAU0000020 - Duplicate Container\nCustomer seeing duplicate containers..."
+        )
+        
+        analyze_button = st.form_submit_button("🔍 Analyze Incident", type="primary", use_container_width=True)
+    
+    # Buttons can't live inside a form; callback runs before the rerun, so no explicit st.rerun() is needed
+    st.button("🗑️ Clear", on_click=clear_incident)
+    
+    if analyze_button:
+        if not incident_text.strip():
+            st.error("⚠️ Please enter incident details")
+        else:
+            with st.spinner("🔄 Analyzing incident..."):
+                try:
+                    with st.status("Analyzing incident...", expanded=True) as status:
+                        step_slot = st.empty()
+                        step_slot.markdown("🔄 Parsing, gathering context, analyzing and drafting escalations...")
+                        
+                        result = run_pipeline(incident_text)
+                        for key in RESULT_KEYS:
+                            st.session_state[key] = result[key]
+                        
+                        parsed = result['parsed_incident']
+                        step_slot.markdown(
+                            f"✅ Incident analyzed — Type: {parsed['incident_type']}, "
+                            f"Module: {parsed['module']}, Severity: {parsed['severity']}"
+                        )
+                        status.update(label="✅ Analysis complete!", state="complete", expanded=False)
+                    
+                    st.session_state.analysis_complete = True
+                    st.session_state.analysis_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+                    if FRAGMENTS_SUPPORTED:
+                        # Results tabs live outside this fragment - rerun the whole app to render them
+                        st.session_state.analysis_just_completed = True
+                        st.rerun()
+                    _show_analysis_success()
+                    
+                except Exception as e:
+                    st.error(f"❌ Error during analysis: {str(e)}")
+                    import traceback
+                    st.code(traceback.format_exc())
+
+
+@fragment
+def _results_fragment():
+    """Analysis results tab - skipped entirely until an analysis has completed"""
+    if not st.session_state.analysis_complete:
+        st.info("👈 Enter an incident in the 'Incident Input' tab and click 'Analyze' to see results here.")
+        return
+    
+    st.header("Analysis Results")
+    
+    parsed = st.session_state.parsed_incident
+    context = st.session_state.context
+    analysis = st.session_state.analysis
+    remediation = st.session_state.remediation
+    
+    # Incident Summary
+    with st.expander("📋 Incident Summary", expanded=True):
+        incident_type = parsed['incident_type'].replace('_', ' ').title()
+        severity_icon = _SEVERITY_ICON.get(parsed['severity'], '⚪')
+        st.markdown(
+            "| Type | Module | Severity |\n"
+            "|---|---|---|\n"
+            f"| {incident_type} | {parsed['module']} | {severity_icon} {parsed['severity']} |"
+        )
+    
+        if parsed['entities']:
+            st.subheader("Entities Found:")
+            # One markdown element for all entity types (two trailing spaces = line break)
+            st.markdown('  \n'.join(
+                f"**{entity_type.title()}:** {', '.join(values)}"
+                for entity_type, values in parsed['entities'].items()
+            ))
+    
+    # Root Cause Analysis
+    with st.expander("🎯 Root Cause Analysis", expanded=True):
+        st.markdown(f"**Root Cause:**")
+        st.write(analysis.get('root_cause', 'N/A'))
+    
+        st.markdown(f"**Impact:**")
+        st.write(analysis.get('impact', 'N/A'))
+    
+        st.markdown(f"**Confidence Level:**")
+        confidence = analysis.get('confidence', 'N/A')
+        if 'HIGH' in confidence.upper():
+            st.success(f"🟢 {confidence}")
+        elif 'MEDIUM' in confidence.upper():
+            st.warning(f"🟡 {confidence}")
+        else:
+            st.info(f"⚪ {confidence}")
+    
+    # Context Found
+    with st.expander("📚 Context Found"):
+        col1, col2 = st.columns(2)
+    
+        with col1:
+            st.subheader("Application Logs")
+            st.write(context['logs']['summary'])
+    
+            st.subheader("Historical Cases")
+            st.write(context['historical_cases']['summary'])
+    
+        with col2:
+            st.subheader("Knowledge Base")
+            st.write(context['knowledge_base']['summary'])
+    
+            st.subheader("Escalation Contacts")
+            st.write(context['escalation_contacts']['summary'])
+    
+    # Remediation Plan
+    with st.expander("🔧 Remediation Plan", expanded=True):
+        st.subheader("Pre-checks")
+        st.write(remediation.get('pre_checks', 'N/A'))
+    
+        st.subheader("Remediation Steps")
+        st.write(remediation.get('steps', 'N/A'))
+    
+        st.subheader("Verification")
+        st.write(remediation.get('verification', 'N/A'))
+    
+        # Download full plan
+        st.download_button(
+            "📥 Download Complete Remediation Plan",
+            data=remediation.get('full_response', ''),
+            file_name=f"remediation_plan_{st.session_state.analysis_ts}.txt",
+            mime="text/plain",
+            key="dl_remediation"
+        )
+
+
+@fragment
+def _escalation_fragment():
+    """Escalation summaries tab - skipped entirely until an analysis has completed"""
+    if not st.session_state.analysis_complete:
+        st.info("👈 Enter an incident in the 'Incident Input' tab and click 'Analyze' to see escalation summaries here.")
+        return
+    
+    st.header("Escalation Summaries")
+    
+    # L3 Technical Summary
+    st.subheader("📧 L3 Engineering Escalation")
+    st.markdown("**Ready to send to L3 Engineering team:**")
+    
+    escalation_l3 = st.session_state.escalation_l3
+    st.text_area(
+        "L3 Escalation Email",
+        value=escalation_l3,
+        height=400,
+        key="l3_text"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "📥 Download L3 Summary",
+            data=escalation_l3,
+            file_name=f"escalation_l3_{st.session_state.analysis_ts}.txt",
+            mime="text/plain",
+            use_container_width=True,
+            key="dl_l3"
+        )
+    
+    with col2:
+        if st.button("📋 Copy to Clipboard", key="copy_l3", use_container_width=True):
+            st.toast("✅ Copied to clipboard!")
+    
+    st.divider()
+    
+    # Management Summary
+    st.subheader("📧 Management Escalation")
+    st.markdown("**Ready to send to Management:**")
+    
+    escalation_mgmt = st.session_state.escalation_mgmt
+    st.text_area(
+        "Management Escalation Email",
+        value=escalation_mgmt,
+        height=300,
+        key="mgmt_text"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "📥 Download Management Summary",
+            data=escalation_mgmt,
+            file_name=f"escalation_mgmt_{st.session_state.analysis_ts}.txt",
+            mime="text/plain",
+            use_container_width=True,
+            key="dl_mgmt"
+        )
+    
+    with col2:
+        if st.button("📋 Copy to Clipboard", key="copy_mgmt", use_container_width=True):
+            st.toast("✅ Copied to clipboard!")
+
+
 def main():
     """Main application"""
     
@@ -121,7 +499,7 @@ def main():
         st.header("📋 System Status")
         
         # Validate system
-        is_valid, message = validate_system()
+        is_valid, message = validate_system_cached()
         if is_valid:
             st.success(message)
         else:
@@ -145,274 +523,27 @@ def main():
         
         # Sample test cases
         st.header("📝 Sample Test Cases")
-        if st.button("Load Test Case 1: Duplicate Container"):
-            st.session_state.sample_incident = """RE: Email ALR-861600 | CMAU0000020 - Duplicate Container information received
-
-To: Ops Team Duty; Jen
-Cc: Customer Service
-
-Hi Jen,
-
-Please assist in checking container CMAU0000020. Customer on PORTNET is seeing 2 identical containers information.
-
-Thanks.
-Regards,
-Kenny"""
-        
-        if st.button("Load Test Case 2: Vessel Error"):
-            st.session_state.sample_incident = """RE: Email ALR-861631 | VESSEL_ERR_4 - System Vessel Name has been used by other vessel advice
-
-To: Ops Team Duty; Vedu
-Cc: Customer Service
-
-Hi Vedu,
-
-Customer reported that they were unable to create vessel advice for MV Lion City 07 and hit error VESSEL_ERR_4. The local vessel name had been used by other vessel advice.
-
-Please assist, thanks.
-Regards,
-Jia Xuan"""
-        
-        if st.button("Load Test Case 3: EDI Stuck"):
-            st.session_state.sample_incident = """Alert: SMS INC-154599
-
-Issue: EDI message REF-IFT-0007 stuck in ERROR status (Sender: LINE-PSA, Recipient: PSA-TOS, State: No acknowledgment sent, ack_at is NULL)."""
+        st.selectbox(
+            "Load sample",
+            [NO_SAMPLE] + list(SAMPLES),
+            key="sample_choice",
+            on_change=load_sample
+        )
     
     # Main content
     tab1, tab2, tab3 = st.tabs(["📥 Incident Input", "📊 Analysis Results", "📤 Escalation Summaries"])
     
     # Tab 1: Incident Input
     with tab1:
-        st.header("Incident Details")
-        
-        # Check if sample incident loaded
-        default_text = st.session_state.get('sample_incident', '')
-        
-        incident_text = st.text_area(
-            "Paste incident report (email, SMS, or call details):",
-            value=default_text,
-            height=300,
-            placeholder="Paste the incident details here...\n\nExample:\nRE: Email ALR-861600 | CMAU0000020 - Duplicate Container\nCustomer seeing duplicate containers..."
-        )
-        
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            analyze_button = st.button("🔍 Analyze Incident", type="primary", use_container_width=True)
-        
-        with col2:
-            clear_button = st.button("🗑️ Clear", use_container_width=True)
-        
-        if clear_button:
-            st.session_state.clear()
-            st.session_state.sample_incident = ''
-            st.rerun()
-        
-        if analyze_button:
-            if not incident_text.strip():
-                st.error("⚠️ Please enter incident details")
-            else:
-                with st.spinner("🔄 Analyzing incident..."):
-                    try:
-                        # Step 1: Parse incident
-                        with st.status("Parsing incident...", expanded=True) as status:
-                            parser = IncidentParser()
-                            parsed = parser.parse(incident_text)
-                            st.session_state.parsed_incident = parsed
-                            st.write("✅ Incident parsed successfully")
-                            st.write(f"Type: {parsed['incident_type']}")
-                            st.write(f"Module: {parsed['module']}")
-                            st.write(f"Severity: {parsed['severity']}")
-                            
-                            # Step 2: Gather context
-                            status.update(label="Gathering context from all sources...")
-                            gatherer = ContextGatherer()
-                            context = gatherer.gather(parsed)
-                            st.session_state.context = context
-                            st.write("✅ Context gathered")
-                            
-                            # Step 3: AI Analysis
-                            status.update(label="Analyzing with AI...")
-                            analyzer = AIAnalyzer()
-                            analysis = analyzer.analyze_incident(parsed, context)
-                            st.session_state.analysis = analysis
-                            st.write("✅ AI analysis complete")
-                            
-                            # Step 4: Remediation Plan
-                            status.update(label="Generating remediation plan...")
-                            remediation = analyzer.generate_remediation_plan(parsed, context, analysis)
-                            st.session_state.remediation = remediation
-                            st.write("✅ Remediation plan generated")
-                            
-                            # Step 5: Escalation Summaries
-                            status.update(label="Creating escalation summaries...")
-                            escalation_l3 = analyzer.generate_escalation_summary(parsed, analysis, remediation, 'L3')
-                            escalation_mgmt = analyzer.generate_escalation_summary(parsed, analysis, remediation, 'management')
-                            st.session_state.escalation_l3 = escalation_l3
-                            st.session_state.escalation_mgmt = escalation_mgmt
-                            st.write("✅ Escalation summaries created")
-                            
-                            status.update(label="✅ Analysis complete!", state="complete", expanded=False)
-                        
-                        st.session_state.analysis_complete = True
-                        st.success("🎉 Analysis completed successfully! View results in the tabs above.")
-                        st.balloons()
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error during analysis: {str(e)}")
-                        import traceback
-                        st.code(traceback.format_exc())
+        _incident_input_fragment()
     
     # Tab 2: Analysis Results
     with tab2:
-        if not st.session_state.analysis_complete:
-            st.info("👈 Enter an incident in the 'Incident Input' tab and click 'Analyze' to see results here.")
-        else:
-            st.header("Analysis Results")
-            
-            parsed = st.session_state.parsed_incident
-            context = st.session_state.context
-            analysis = st.session_state.analysis
-            remediation = st.session_state.remediation
-            
-            # Incident Summary
-            with st.expander("📋 Incident Summary", expanded=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Type", parsed['incident_type'].replace('_', ' ').title())
-                with col2:
-                    st.metric("Module", parsed['module'])
-                with col3:
-                    severity_color = {
-                        'LOW': '🟢',
-                        'MEDIUM': '🟡',
-                        'HIGH': '🟠',
-                        'CRITICAL': '🔴'
-                    }
-                    st.metric("Severity", f"{severity_color.get(parsed['severity'], '⚪')} {parsed['severity']}")
-                
-                if parsed['entities']:
-                    st.subheader("Entities Found:")
-                    for entity_type, values in parsed['entities'].items():
-                        st.write(f"**{entity_type.title()}:** {', '.join(values)}")
-            
-            # Root Cause Analysis
-            with st.expander("🎯 Root Cause Analysis", expanded=True):
-                st.markdown(f"**Root Cause:**")
-                st.write(analysis.get('root_cause', 'N/A'))
-                
-                st.markdown(f"**Impact:**")
-                st.write(analysis.get('impact', 'N/A'))
-                
-                st.markdown(f"**Confidence Level:**")
-                confidence = analysis.get('confidence', 'N/A')
-                if 'HIGH' in confidence.upper():
-                    st.success(f"🟢 {confidence}")
-                elif 'MEDIUM' in confidence.upper():
-                    st.warning(f"🟡 {confidence}")
-                else:
-                    st.info(f"⚪ {confidence}")
-            
-            # Context Found
-            with st.expander("📚 Context Found"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.subheader("Application Logs")
-                    st.write(context['logs']['summary'])
-                    
-                    st.subheader("Historical Cases")
-                    st.write(context['historical_cases']['summary'])
-                
-                with col2:
-                    st.subheader("Knowledge Base")
-                    st.write(context['knowledge_base']['summary'])
-                    
-                    st.subheader("Escalation Contacts")
-                    st.write(context['escalation_contacts']['summary'])
-            
-            # Remediation Plan
-            with st.expander("🔧 Remediation Plan", expanded=True):
-                st.subheader("Pre-checks")
-                st.write(remediation.get('pre_checks', 'N/A'))
-                
-                st.subheader("Remediation Steps")
-                st.write(remediation.get('steps', 'N/A'))
-                
-                st.subheader("Verification")
-                st.write(remediation.get('verification', 'N/A'))
-                
-                # Download full plan
-                if st.download_button(
-                    "📥 Download Complete Remediation Plan",
-                    data=remediation.get('full_response', ''),
-                    file_name=f"remediation_plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain"
-                ):
-                    st.success("Downloaded!")
+        _results_fragment()
     
     # Tab 3: Escalation Summaries
     with tab3:
-        if not st.session_state.analysis_complete:
-            st.info("👈 Enter an incident in the 'Incident Input' tab and click 'Analyze' to see escalation summaries here.")
-        else:
-            st.header("Escalation Summaries")
-            
-            # L3 Technical Summary
-            st.subheader("📧 L3 Engineering Escalation")
-            st.markdown("**Ready to send to L3 Engineering team:**")
-            
-            escalation_l3 = st.session_state.escalation_l3
-            st.text_area(
-                "L3 Escalation Email",
-                value=escalation_l3,
-                height=400,
-                key="l3_text"
-            )
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.download_button(
-                    "📥 Download L3 Summary",
-                    data=escalation_l3,
-                    file_name=f"escalation_l3_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                ):
-                    st.success("Downloaded!")
-            
-            with col2:
-                if st.button("📋 Copy to Clipboard", key="copy_l3", use_container_width=True):
-                    st.toast("✅ Copied to clipboard!")
-            
-            st.divider()
-            
-            # Management Summary
-            st.subheader("📧 Management Escalation")
-            st.markdown("**Ready to send to Management:**")
-            
-            escalation_mgmt = st.session_state.escalation_mgmt
-            st.text_area(
-                "Management Escalation Email",
-                value=escalation_mgmt,
-                height=300,
-                key="mgmt_text"
-            )
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.download_button(
-                    "📥 Download Management Summary",
-                    data=escalation_mgmt,
-                    file_name=f"escalation_mgmt_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                ):
-                    st.success("Downloaded!")
-            
-            with col2:
-                if st.button("📋 Copy to Clipboard", key="copy_mgmt", use_container_width=True):
-                    st.toast("✅ Copied to clipboard!")
+        _escalation_fragment()
     
     # Footer
     st.divider()
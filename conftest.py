@@ -0,0 +1,46 @@
+"""
+pytest configuration for the root-level test scripts
+
+The scripts still run on their own (python test_phase2.py). Under pytest
+they share one parser, gatherer and analyzer for the whole session, and a
+test returning False fails, as it does in the scripts' own summaries.
+"""
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from analyzers import IncidentParser, ContextGatherer, AIAnalyzer
+from utils.config import AZURE_OPENAI_CONFIG
+
+# Calls Azure at import time, so collecting it would run it - use python test_azure_api.py
+collect_ignore = ['test_azure_api.py']
+
+
+@pytest.fixture(scope='session')
+def incident_parser():
+    """IncidentParser shared by every test (its parse cache included)"""
+    return IncidentParser()
+
+
+@pytest.fixture(scope='session')
+def context_gatherer():
+    """ContextGatherer shared by every test, so the data sources load once"""
+    return ContextGatherer()
+
+
+@pytest.fixture(scope='session')
+def ai_analyzer():
+    """AIAnalyzer (and Azure client) shared by every test that calls the AI"""
+    if not AZURE_OPENAI_CONFIG['api_key']:
+        pytest.skip("AZURE_OPENAI_API_KEY not set")
+    return AIAnalyzer()
+
+
+def pytest_pyfunc_call(pyfuncitem):
+    """Call a test function, failing it if it returns False"""
+    argnames = pyfuncitem._fixtureinfo.argnames
+    result = pyfuncitem.obj(**{name: pyfuncitem.funcargs[name] for name in argnames})
+    if result is False:
+        pytest.fail(f"{pyfuncitem.name} returned False", pytrace=False)
+    return True
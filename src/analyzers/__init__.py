@@ -2,12 +2,29 @@
 Analyzers package for PORTNET Incident Resolver
 Core intelligence modules
 """
-from .incident_parser import IncidentParser
-from .context_gatherer import ContextGatherer
-from .ai_analyzer import AIAnalyzer
+import importlib
+
+# Submodules are imported on first attribute access so that importing the
+# package (e.g. for IncidentParser alone) does not pull in the OpenAI SDK
+_LAZY_IMPORTS = {
+    'IncidentParser': '.incident_parser',
+    'ContextGatherer': '.context_gatherer',
+    'format_context_for_prompt': '.context_gatherer',
+    'AIAnalyzer': '.ai_analyzer'
+}
 
 __all__ = [
     'IncidentParser',
     'ContextGatherer',
+    'format_context_for_prompt',
     'AIAnalyzer'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,25 +1,360 @@
 """
 AI Analyzer - Uses Azure OpenAI to analyze incidents and generate solutions
 """
+import re
 import json
-from typing import Dict, Optional
-from openai import AzureOpenAI
-from utils.config import AZURE_OPENAI_CONFIG
+import hashlib
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from openai import (
+    AzureOpenAI,
+    AsyncAzureOpenAI,
+    OpenAI,
+    AsyncOpenAI,
+    RateLimitError,
+    APIConnectionError,
+    AuthenticationError,
+    PermissionDeniedError,
+    NotFoundError
+)
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential
+)
+from utils.config import (
+    AZURE_OPENAI_CONFIG,
+    OPENAI_FALLBACK_CONFIG,
+    ENABLE_CAG_SHORTCUT,
+    CAG_SIMILARITY_THRESHOLD,
+    CAG_MIN_MATCHED_KEYWORDS,
+    RESPONSE_CACHE_DIR
+)
+from cachetools import TTLCache
+from pydantic import BaseModel, Field
+from utils.cache import ResponseCache, SemanticCache
+from utils.http_client import get_shared_async_client, get_shared_client, run_sync
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying (APIConnectionError includes APITimeoutError). Once the
+# retries and the fallback provider are exhausted they are raised to the caller.
+TRANSIENT_ERRORS = (RateLimitError, APIConnectionError)
+
+# Bad key / missing deployment - retrying or switching provider won't help
+FATAL_ERRORS = (AuthenticationError, PermissionDeniedError, NotFoundError)
+
+# Backoff applied to every completion request
+RETRY_POLICY = {
+    'retry': retry_if_exception_type(TRANSIENT_ERRORS),
+    'wait': wait_random_exponential(min=1, max=30),
+    'stop': stop_after_attempt(5),
+    'reraise': True
+}
+
+# Default sampling temperature - greedy decoding keeps cached responses representative
+TEMPERATURE = 0
+
+# Start of the text returned in place of a response when an AI call fails
+AI_ERROR_PREFIX = "Error: Unable to get AI response"
+
+# Seconds a successful test_connection() is trusted before pinging again
+CONNECTION_CHECK_TTL = 300
+
+# Seconds a cached AI response stays valid, per call type
+RESPONSE_CACHE_TTL = {
+    'analysis': 3600,
+    'remediation': 3600,
+    'escalation': 86400
+}
+
+# Section headers in AI responses, e.g. "2. **Impact Assessment**", "### Rollback Plan",
+# "**Confidence Level**: HIGH". Keyword -> section name.
+SECTION_TAGS = {
+    'root cause': 'root_cause',
+    'impact': 'impact',
+    'evidence': 'evidence',
+    'confidence': 'confidence',
+    'pre-check': 'pre_checks',
+    'precheck': 'pre_checks',
+    'pre check': 'pre_checks',
+    'remediation step': 'steps',
+    'expected outcome': 'expected_outcome',
+    'verification': 'verification',
+    'rollback': 'rollback',
+    'monitoring': 'monitoring'
+}
+
+# A header needs a marker (#, "1." or **) or a short label ending in a colon,
+# so body lines such as "Impact was limited to ..." are not split on
+_SECTION_RE = re.compile(
+    r'^[ \t]*(?P<marker>(?:#+[ \t]*)?(?:\d+\.[ \t]*)?(?:\*\*)?)[ \t]*'
+    r'(?P<tag>root cause|impact|evidence|confidence|pre[- ]?check|remediation step|'
+    r'expected outcome|verification|rollback|monitoring)(?P<rest>[^\n]*)$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+_PLAIN_LABEL_RE = re.compile(r'[\w \t-]{0,30}:')
+
+# Fallback when a response has no recognisable headers: top-level "N." lines
+_NUMBERED_RE = re.compile(r'^[ \t]*(?:#+[ \t]*)?(?P<tag>\d+)\.(?P<rest>[^\n]*)$', re.MULTILINE)
+
+# Static prompt blocks. They are sent ahead of the incident-specific message and
+# never interpolated, so repeated calls share an identical prefix that the
+# provider's automatic prompt caching can reuse.
+PORTNET_SYSTEM_PROMPT = "You are an expert technical analyst for PORTNET maritime operations. Provide clear, actionable analysis and recommendations."
+
+ANALYSIS_TEMPLATE_PREFIX = """You are an expert incident analyst for PORTNET, Singapore's maritime port community system.
+
+# Your Task
+Analyze the incident in the next message, using the context provided with it, and provide:
+
+1. **Root Cause Analysis** (2-3 sentences)
+   - What is the underlying cause?
+   - Why did it happen?
+
+2. **Impact Assessment** (2-3 sentences)
+   - What systems/processes are affected?
+   - What is the business impact?
+
+3. **Evidence** (bullet points)
+   - Key log entries or data that support your analysis
+   - Reference specific error messages or patterns
+
+4. **Confidence Level**
+   - HIGH: Clear root cause with strong evidence
+   - MEDIUM: Likely cause with supporting evidence
+   - LOW: Hypothesis that needs verification
+
+Provide your analysis in a clear, structured format. Be specific and reference the context provided.
+"""
+
+REMEDIATION_TEMPLATE_PREFIX = """You are creating a remediation plan for a PORTNET incident.
+
+# Your Task
+Create a detailed, actionable remediation plan for the incident in the next message:
+
+1. **Pre-checks** (What to verify before starting)
+   - Specific queries or checks to run
+   - What to look for
+
+2. **Remediation Steps** (Numbered, specific actions)
+   - Include exact SQL queries if database changes needed
+   - Include specific commands or procedures
+   - Each step should be clear and actionable
+
+3. **Expected Outcome** (For each step)
+   - What should happen after each step
+   - How to verify it worked
+
+4. **Verification Steps** (How to confirm the fix worked)
+   - Specific checks to perform
+   - Success criteria
+
+5. **Rollback Plan** (If something goes wrong)
+   - How to revert changes
+   - What to do if fix doesn't work
+
+6. **Monitoring** (What to watch after fix)
+   - Logs to monitor
+   - Metrics to track
+   - How long to monitor
+
+Be very specific. If you recommend a SQL query, write the actual query. If you recommend checking logs, specify which service and what to look for.
+"""
+
+# Escalation instructions go after the incident block: both audiences are
+# generated from the same incident, so that block is the shared prefix
+ESCALATION_L3_INSTRUCTIONS = """Create a technical escalation summary for L3 Engineering team, for the incident in the previous message.
+
+Create a concise email suitable for L3 engineers:
+
+Subject: [Clear, specific subject line]
+
+Body:
+- Brief incident description (2-3 sentences)
+- Root cause (technical details)
+- Immediate actions taken/needed
+- Technical details (error codes, affected services, log references)
+- Recommended fix with technical specifics
+- Verification steps
+- Any risks or dependencies
+
+Keep it technical, specific, and actionable. Engineers should know exactly what to do after reading this.
+"""
+
+ESCALATION_MGMT_INSTRUCTIONS = """Create a business-focused escalation summary for Management, for the incident in the previous message.
+
+Current status: root cause identified, resolution in progress.
+
+Create a concise email suitable for management:
+
+Subject: [Clear subject with business impact]
+
+Body:
+- What happened (business terms, 2-3 sentences)
+- Customer/business impact
+- Root cause (non-technical explanation)
+- Resolution timeline
+- Current status
+- Risk mitigation
+- Next steps
+
+Focus on business impact and timeline. Avoid technical jargon. Management should understand the business implications and timeline.
+"""
+
+
+RESOLUTION_TEMPLATE_PREFIX = """You are resolving a PORTNET incident end to end.
+
+# Your Task
+For the incident in the next message, using the context provided with it, fill in every field of the response schema:
+
+- analysis: root cause (2-3 sentences), impact (2-3 sentences), evidence (bullet points referencing specific log entries or errors) and confidence (HIGH, MEDIUM or LOW with a short reason)
+- remediation: pre-checks, numbered remediation steps (exact SQL or commands where needed), expected outcome, verification steps, rollback plan and monitoring
+- escalation_l3: a concise technical email for L3 engineers, starting with "Subject:"
+- escalation_management: a concise business-focused email for management without technical jargon, starting with "Subject:"
+
+Be very specific and reference the context provided.
+"""
+
+
+class AnalysisSections(BaseModel):
+    """Structured incident analysis (field titles become the section headings)"""
+    root_cause: str = Field(title='Root Cause Analysis')
+    impact: str = Field(title='Impact Assessment')
+    evidence: str = Field(title='Evidence')
+    confidence: str = Field(title='Confidence Level')
+
+
+class RemediationSections(BaseModel):
+    """Structured remediation plan, in the order of REMEDIATION_TEMPLATE_PREFIX"""
+    pre_checks: str = Field(title='Pre-checks')
+    steps: str = Field(title='Remediation Steps')
+    expected_outcome: str = Field(title='Expected Outcome')
+    verification: str = Field(title='Verification Steps')
+    rollback: str = Field(title='Rollback Plan')
+    monitoring: str = Field(title='Monitoring')
+
+
+class IncidentResolution(BaseModel):
+    """Everything resolve_incident() gets back from a single structured-output call"""
+    analysis: AnalysisSections
+    remediation: RemediationSections
+    escalation_l3: str
+    escalation_management: str
 
 
 class AIAnalyzer:
     """Analyze incidents using Azure OpenAI"""
     
-    def __init__(self):
-        """Initialize Azure OpenAI client"""
-        self.client = AzureOpenAI(
-            api_key=AZURE_OPENAI_CONFIG['api_key'],
-            api_version=AZURE_OPENAI_CONFIG['api_version'],
-            azure_endpoint=AZURE_OPENAI_CONFIG['endpoint'],
-            timeout=60.0
+    # (section name, number it has in the prompt template) - the number is the
+    # fallback key when the response uses numbered headings without keywords
+    _ANALYSIS_SECTIONS = (
+        ('root_cause', '1'),
+        ('impact', '2'),
+        ('evidence', '3'),
+        ('confidence', '4')
+    )
+    _REMEDIATION_SECTIONS = (
+        ('pre_checks', '1'),
+        ('steps', '2'),
+        ('verification', '4'),
+        ('rollback', '5'),
+        ('monitoring', '6')
+    )
+    
+    def __init__(
+        self,
+        client=None,
+        deployment: Optional[str] = None,
+        aclient=None,
+        embedding_deployment: Optional[str] = None,
+        fallback_client=None,
+        afallback_client=None
+    ):
+        """
+        Initialize Azure OpenAI clients
+        
+        Args:
+            client: Optional pre-built OpenAI-compatible client (defaults to Azure OpenAI)
+            deployment: Model/deployment name to use with the client
+            aclient: Optional async counterpart of client. When a custom client is
+                given without one, the *_async methods run the sync client in a thread.
+            embedding_deployment: Embedding model for the semantic analysis cache.
+                Defaults to the configured Azure deployment when client is omitted;
+                the cache is disabled when neither is set.
+            fallback_client: Optional OpenAI-compatible client tried once Azure keeps
+                rate limiting / timing out. Built from OPENAI_FALLBACK_CONFIG when
+                client is omitted and a fallback key is configured.
+            afallback_client: Async counterpart of fallback_client
+        """
+        if client is None:
+            embedding_deployment = embedding_deployment or AZURE_OPENAI_CONFIG['embedding_deployment']
+            if fallback_client is None and OPENAI_FALLBACK_CONFIG['api_key']:
+                fallback_client = OpenAI(
+                    api_key=OPENAI_FALLBACK_CONFIG['api_key'],
+                    timeout=60.0,
+                    http_client=get_shared_client()
+                )
+                afallback_client = afallback_client or AsyncOpenAI(
+                    api_key=OPENAI_FALLBACK_CONFIG['api_key'],
+                    timeout=60.0,
+                    http_client=get_shared_async_client()
+                )
+            client = AzureOpenAI(
+                api_key=AZURE_OPENAI_CONFIG['api_key'],
+                api_version=AZURE_OPENAI_CONFIG['api_version'],
+                azure_endpoint=AZURE_OPENAI_CONFIG['endpoint'],
+                timeout=60.0,
+                http_client=get_shared_client()
+            )
+            aclient = aclient or AsyncAzureOpenAI(
+                api_key=AZURE_OPENAI_CONFIG['api_key'],
+                api_version=AZURE_OPENAI_CONFIG['api_version'],
+                azure_endpoint=AZURE_OPENAI_CONFIG['endpoint'],
+                timeout=60.0,
+                # One keep-alive pool shared by every analyzer in the process
+                http_client=get_shared_async_client()
+            )
+        self.client = client
+        self.aclient = aclient
+        self.cache = ResponseCache(
+            maxsize=1024,
+            ttl=RESPONSE_CACHE_TTL['analysis'],
+            path=Path(RESPONSE_CACHE_DIR) / 'ai_responses' if RESPONSE_CACHE_DIR else None
         )
-        self.deployment = AZURE_OPENAI_CONFIG['deployment']
-        print("✅ AI Analyzer initialized")
+        # Built prompt messages, keyed on the content that goes into them
+        self._prompt_cache = TTLCache(maxsize=256, ttl=600)
+        self._prompt_lock = threading.Lock()
+        self.deployment = deployment or AZURE_OPENAI_CONFIG['deployment']
+        self.embedding_deployment = embedding_deployment
+        self.fallback_client = fallback_client
+        self.afallback_client = afallback_client
+        self.fallback_model = OPENAI_FALLBACK_CONFIG['model']
+        # Per instance so the shortcut can be A/B tested without touching the env
+        self.cag_shortcut = ENABLE_CAG_SHORTCUT
+        # time.time() of the last successful test_connection() ping
+        self._connection_ok_at = 0.0
+        # Paraphrased alerts about the same incident reuse one analysis / remediation plan
+        self.semantic_cache = SemanticCache(
+            threshold=AZURE_OPENAI_CONFIG['semantic_cache_threshold'],
+            ttl=RESPONSE_CACHE_TTL['analysis']
+        ) if embedding_deployment else None
+        self.remediation_semantic_cache = SemanticCache(
+            threshold=AZURE_OPENAI_CONFIG['semantic_cache_threshold'],
+            ttl=RESPONSE_CACHE_TTL['remediation']
+        ) if embedding_deployment else None
+        # Both lookups embed the same incident text; only pay for it once
+        self._embeddings = TTLCache(maxsize=256, ttl=600)
+        self._embedding_lock = threading.Lock()
+        logger.info("AI Analyzer initialized (deployment=%s)", self.deployment)
     
     def analyze_incident(
         self,
@@ -36,18 +371,32 @@ class AIAnalyzer:
         Returns:
             Dictionary with AI analysis results
         """
-        print("\n🤖 Analyzing incident with AI...")
+        logger.debug("Analyzing incident with AI")
+        
+        match = self._historical_match(context)
+        if match:
+            return self._analysis_from_case(match)
         
-        # Build prompt
-        prompt = self._build_analysis_prompt(parsed_incident, context)
+        # Build messages
+        messages = self._build_analysis_messages(parsed_incident, context)
         
-        # Get AI analysis
-        analysis = self._call_ai(prompt, max_tokens=1500)
+        # Same prompt as before? Then there is no need to embed it
+        analysis = self._cached_response(messages, max_tokens=1500)
+        
+        if analysis is None:
+            # Near-duplicate of an incident analyzed before?
+            embedding = self._embed(parsed_incident.get('raw_text', ''))
+            analysis = self._semantic_lookup(self.semantic_cache, embedding, 'analysis')
+            
+            if analysis is None:
+                # Get AI analysis
+                analysis = self._call_ai(messages, max_tokens=1500, cache_ttl=RESPONSE_CACHE_TTL['analysis'])
+                self._semantic_store(self.semantic_cache, embedding, analysis)
         
         # Parse response
-        parsed_analysis = self._parse_analysis_response(analysis)
+        parsed_analysis = self.parse_analysis_response(analysis)
         
-        print("✅ AI analysis complete")
+        logger.info("AI analysis complete")
         
         return parsed_analysis
     
@@ -68,15 +417,27 @@ class AIAnalyzer:
         Returns:
             Dictionary with remediation plan
         """
-        print("🔧 Generating remediation plan...")
+        logger.debug("Generating remediation plan")
         
-        prompt = self._build_remediation_prompt(parsed_incident, context, analysis)
+        match = self._historical_match(context)
+        if match:
+            return self._remediation_from_case(match)
         
-        remediation = self._call_ai(prompt, max_tokens=2000)
+        messages = self._build_remediation_messages(parsed_incident, context, analysis)
         
-        parsed_remediation = self._parse_remediation_response(remediation)
+        remediation = self._cached_response(messages, max_tokens=2000)
+        
+        if remediation is None:
+            embedding = self._embed(parsed_incident.get('raw_text', ''))
+            remediation = self._semantic_lookup(self.remediation_semantic_cache, embedding, 'remediation plan')
+            
+            if remediation is None:
+                remediation = self._call_ai(messages, max_tokens=2000, cache_ttl=RESPONSE_CACHE_TTL['remediation'])
+                self._semantic_store(self.remediation_semantic_cache, embedding, remediation)
         
-        print("✅ Remediation plan generated")
+        parsed_remediation = self.parse_remediation_response(remediation)
+        
+        logger.info("Remediation plan generated")
         
         return parsed_remediation
     
@@ -99,30 +460,318 @@ class AIAnalyzer:
         Returns:
             Formatted escalation summary
         """
-        print(f"📤 Generating {recipient_type} escalation summary...")
+        logger.debug("Generating %s escalation summary", recipient_type)
         
-        prompt = self._build_escalation_prompt(
+        messages = self._build_escalation_messages(
             parsed_incident,
             analysis,
             remediation,
             recipient_type
         )
         
-        summary = self._call_ai(prompt, max_tokens=1000)
+        summary = self._call_ai(messages, max_tokens=1000, cache_ttl=RESPONSE_CACHE_TTL['escalation'])
         
-        print("✅ Escalation summary generated")
+        logger.info("Escalation summary generated")
         
         return summary
     
-    def _build_analysis_prompt(self, parsed_incident: Dict, context: Dict) -> str:
-        """Build prompt for incident analysis"""
+    async def analyze_incident_async(self, parsed_incident: Dict, context: Dict) -> Dict:
+        """Async version of analyze_incident()"""
+        logger.debug("Analyzing incident with AI")
         
-        # Format context for inclusion
-        context_text = self._format_context_for_prompt(context)
+        match = self._historical_match(context)
+        if match:
+            return self._analysis_from_case(match)
         
-        prompt = f"""You are an expert incident analyst for PORTNET, Singapore's maritime port community system.
-
-# Incident Details
+        messages = self._build_analysis_messages(parsed_incident, context)
+        analysis = self._cached_response(messages, max_tokens=1500)
+        
+        if analysis is None:
+            embedding = await self._embed_async(parsed_incident.get('raw_text', ''))
+            analysis = self._semantic_lookup(self.semantic_cache, embedding, 'analysis')
+            
+            if analysis is None:
+                analysis = await self._call_ai_async(messages, max_tokens=1500, cache_ttl=RESPONSE_CACHE_TTL['analysis'])
+                self._semantic_store(self.semantic_cache, embedding, analysis)
+        
+        logger.info("AI analysis complete")
+        
+        return self.parse_analysis_response(analysis)
+    
+    async def generate_remediation_plan_async(
+        self,
+        parsed_incident: Dict,
+        context: Dict,
+        analysis: Dict
+    ) -> Dict:
+        """Async version of generate_remediation_plan()"""
+        logger.debug("Generating remediation plan")
+        
+        match = self._historical_match(context)
+        if match:
+            return self._remediation_from_case(match)
+        
+        messages = self._build_remediation_messages(parsed_incident, context, analysis)
+        remediation = self._cached_response(messages, max_tokens=2000)
+        
+        if remediation is None:
+            embedding = await self._embed_async(parsed_incident.get('raw_text', ''))
+            remediation = self._semantic_lookup(self.remediation_semantic_cache, embedding, 'remediation plan')
+            
+            if remediation is None:
+                remediation = await self._call_ai_async(messages, max_tokens=2000, cache_ttl=RESPONSE_CACHE_TTL['remediation'])
+                self._semantic_store(self.remediation_semantic_cache, embedding, remediation)
+        
+        logger.info("Remediation plan generated")
+        
+        return self.parse_remediation_response(remediation)
+    
+    async def generate_escalation_summary_async(
+        self,
+        parsed_incident: Dict,
+        analysis: Dict,
+        remediation: Dict,
+        recipient_type: str = 'L3'
+    ) -> str:
+        """Async version of generate_escalation_summary()"""
+        logger.debug("Generating %s escalation summary", recipient_type)
+        
+        messages = self._build_escalation_messages(
+            parsed_incident,
+            analysis,
+            remediation,
+            recipient_type
+        )
+        summary = await self._call_ai_async(messages, max_tokens=1000, cache_ttl=RESPONSE_CACHE_TTL['escalation'])
+        
+        logger.info("Escalation summary generated")
+        
+        return summary
+    
+    async def process_incident(self, parsed_incident: Dict, context: Dict) -> Dict:
+        """
+        Run analysis, remediation and both escalation summaries
+        
+        Analysis and remediation depend on each other and run in sequence;
+        the L3 and management summaries are generated concurrently.
+        
+        Args:
+            parsed_incident: Parsed incident from IncidentParser
+            context: Gathered context from ContextGatherer
+            
+        Returns:
+            Dictionary with analysis, remediation, escalation_l3 and escalation_mgmt
+        """
+        analysis = await self.analyze_incident_async(parsed_incident, context)
+        remediation = await self.generate_remediation_plan_async(parsed_incident, context, analysis)
+        
+        escalation_l3, escalation_mgmt = await asyncio.gather(
+            self.generate_escalation_summary_async(parsed_incident, analysis, remediation, 'L3'),
+            self.generate_escalation_summary_async(parsed_incident, analysis, remediation, 'management')
+        )
+        
+        return {
+            'analysis': analysis,
+            'remediation': remediation,
+            'escalation_l3': escalation_l3,
+            'escalation_mgmt': escalation_mgmt
+        }
+    
+    async def analyze_incidents_batch(self, incidents: List[Dict], gatherer) -> List:
+        """
+        Process many incidents concurrently
+        
+        At most AZURE_OPENAI_CONFIG['max_concurrency'] incidents are in flight at
+        once to stay inside Azure rate limits; each AI call retries rate limits /
+        timeouts on its own.
+        
+        Args:
+            incidents: Parsed incidents from IncidentParser
+            gatherer: ContextGatherer used to collect context for each incident
+            
+        Returns:
+            One process_incident() result per incident, in order, or the
+            exception raised for that incident
+        """
+        semaphore = asyncio.Semaphore(AZURE_OPENAI_CONFIG['max_concurrency'])
+        
+        async def process_one(parsed_incident: Dict) -> Dict:
+            async with semaphore:
+                context = await gatherer.gather_async(parsed_incident)
+                result = await self.process_incident(parsed_incident, context)
+                result['context'] = context
+                return result
+        
+        return await asyncio.gather(
+            *(process_one(incident) for incident in incidents),
+            return_exceptions=True
+        )
+    
+    def analyze_incidents_batch_sync(self, incidents: List[Dict], gatherer) -> List:
+        """Blocking wrapper around analyze_incidents_batch()"""
+        return run_sync(self.analyze_incidents_batch(incidents, gatherer))
+    
+    def process_incident_sync(self, parsed_incident: Dict, context: Dict) -> Dict:
+        """Blocking wrapper around process_incident() for non-async callers"""
+        # Runs on the shared loop so pooled connections stay usable between calls
+        return run_sync(self.process_incident(parsed_incident, context))
+    
+    def resolve_incident(self, parsed_incident: Dict, context: Dict) -> Dict:
+        """
+        Analysis, remediation and both escalations from one structured-output call
+        
+        The incident and its context are sent once instead of to four separate
+        prompts. Falls back to the staged calls (process_incident_sync) if the
+        structured call fails or the model refuses.
+        
+        Args:
+            parsed_incident: Parsed incident from IncidentParser
+            context: Gathered context from ContextGatherer
+            
+        Returns:
+            Dictionary with analysis, remediation, escalation_l3 and escalation_mgmt
+        """
+        logger.debug("Resolving incident with one structured call")
+        
+        if self._historical_match(context):
+            # Analysis and remediation come from the case log; only the escalations need the AI
+            return self.process_incident_sync(parsed_incident, context)
+        
+        messages = self._build_resolution_messages(parsed_incident, context)
+        try:
+            resolution = self._call_ai_structured(messages, max_tokens=5000)
+        except Exception as e:
+            resolution = None
+            logger.warning("Structured resolution failed, using staged calls: %s", e)
+        
+        if resolution is None:
+            return self.process_incident_sync(parsed_incident, context)
+        
+        analysis = resolution.analysis.model_dump()
+        analysis['full_response'] = self._render_sections(resolution.analysis)
+        
+        remediation = resolution.remediation.model_dump()
+        full_remediation = self._render_sections(resolution.remediation)
+        remediation['full_response'] = full_remediation
+        remediation['summary'] = full_remediation[:500] + '...' if len(full_remediation) > 500 else full_remediation
+        
+        logger.info("Incident resolved")
+        
+        return {
+            'analysis': analysis,
+            'remediation': remediation,
+            'escalation_l3': resolution.escalation_l3,
+            'escalation_mgmt': resolution.escalation_management
+        }
+    
+    def analyze_incident_stream(self, parsed_incident: Dict, context: Dict) -> Iterator[str]:
+        """
+        Stream the raw AI analysis as it is generated
+        
+        Pass the joined text to parse_analysis_response() for the
+        structured result returned by analyze_incident().
+        
+        Args:
+            parsed_incident: Parsed incident from IncidentParser
+            context: Gathered context from ContextGatherer
+            
+        Yields:
+            Response text chunks
+            
+        Raises:
+            Exception: If the stream fails after its first chunk (see _call_ai_stream())
+        """
+        messages = self._build_analysis_messages(parsed_incident, context)
+        yield from self._call_ai_stream(messages, max_tokens=1500, cache_ttl=RESPONSE_CACHE_TTL['analysis'])
+    
+    def generate_remediation_plan_stream(
+        self,
+        parsed_incident: Dict,
+        context: Dict,
+        analysis: Dict
+    ) -> Iterator[str]:
+        """
+        Stream the raw remediation plan as it is generated
+        
+        Pass the joined text to parse_remediation_response() for the
+        structured result returned by generate_remediation_plan().
+        
+        Yields:
+            Response text chunks
+        """
+        messages = self._build_remediation_messages(parsed_incident, context, analysis)
+        yield from self._call_ai_stream(messages, max_tokens=2000, cache_ttl=RESPONSE_CACHE_TTL['remediation'])
+    
+    def generate_escalation_summary_stream(
+        self,
+        parsed_incident: Dict,
+        analysis: Dict,
+        remediation: Dict,
+        recipient_type: str = 'L3'
+    ) -> Iterator[str]:
+        """
+        Stream an escalation summary as it is generated
+        
+        Yields:
+            Response text chunks
+        """
+        messages = self._build_escalation_messages(
+            parsed_incident,
+            analysis,
+            remediation,
+            recipient_type
+        )
+        yield from self._call_ai_stream(messages, max_tokens=1000, cache_ttl=RESPONSE_CACHE_TTL['escalation'])
+    
+    async def generate_escalation_summary_stream_async(
+        self,
+        parsed_incident: Dict,
+        analysis: Dict,
+        remediation: Dict,
+        recipient_type: str = 'L3'
+    ) -> AsyncIterator[str]:
+        """
+        Async stream of an escalation summary as it is generated
+        
+        Yields:
+            Response text chunks
+        """
+        messages = self._build_escalation_messages(
+            parsed_incident,
+            analysis,
+            remediation,
+            recipient_type
+        )
+        async for part in self._call_ai_stream_async(
+            messages, max_tokens=1000, cache_ttl=RESPONSE_CACHE_TTL['escalation']
+        ):
+            yield part
+    
+    def _build_analysis_messages(self, parsed_incident: Dict, context: Dict) -> list:
+        """Build messages for incident analysis"""
+        
+        # ContextGatherer.gather() pre-formats the context once per incident
+        formatted = context.get('_formatted')
+        key = ResponseCache.make_key(
+            'analysis',
+            parsed_incident.get('incident_type', 'Unknown'),
+            parsed_incident.get('module', 'Unknown'),
+            parsed_incident.get('severity', 'MEDIUM'),
+            parsed_incident.get('raw_text', ''),
+            formatted if formatted else json.dumps(context, sort_keys=True, default=str)
+        )
+        cached = self._cached_prompt(key)
+        if cached is not None:
+            return cached
+        
+        if formatted:
+            context_text = formatted
+        else:
+            # Imported here so that importing AIAnalyzer doesn't load the parsers
+            from .context_gatherer import format_context_for_prompt
+            context_text = format_context_for_prompt(context)
+        
+        incident_section = f"""# Incident Details
 Type: {parsed_incident.get('incident_type', 'Unknown')}
 Module: {parsed_incident.get('module', 'Unknown')}
 Severity: {parsed_incident.get('severity', 'MEDIUM')}
@@ -130,230 +779,559 @@ Severity: {parsed_incident.get('severity', 'MEDIUM')}
 Incident Description:
 {parsed_incident.get('raw_text', '')}
 
-{context_text}
-
-# Your Task
-Analyze this incident and provide:
-
-1. **Root Cause Analysis** (2-3 sentences)
-   - What is the underlying cause?
-   - Why did it happen?
-
-2. **Impact Assessment** (2-3 sentences)
-   - What systems/processes are affected?
-   - What is the business impact?
-
-3. **Evidence** (bullet points)
-   - Key log entries or data that support your analysis
-   - Reference specific error messages or patterns
-
-4. **Confidence Level**
-   - HIGH: Clear root cause with strong evidence
-   - MEDIUM: Likely cause with supporting evidence
-   - LOW: Hypothesis that needs verification
-
-Provide your analysis in a clear, structured format. Be specific and reference the context provided.
-"""
+{context_text}"""
         
-        return prompt
+        return self._store_prompt(key, self._build_messages(ANALYSIS_TEMPLATE_PREFIX, incident_section))
+    
+    def _build_resolution_messages(self, parsed_incident: Dict, context: Dict) -> list:
+        """Build messages for resolve_incident() - the analysis incident section, one combined task"""
+        incident_section = self._build_analysis_messages(parsed_incident, context)[-1]['content']
+        return self._build_messages(RESOLUTION_TEMPLATE_PREFIX, incident_section)
     
-    def _build_remediation_prompt(
+    def _build_remediation_messages(
         self,
         parsed_incident: Dict,
         context: Dict,
         analysis: Dict
-    ) -> str:
-        """Build prompt for remediation plan"""
+    ) -> list:
+        """Build messages for remediation plan"""
         
-        prompt = f"""You are creating a remediation plan for a PORTNET incident.
-
-# Incident
+        key = ResponseCache.make_key(
+            'remediation',
+            parsed_incident.get('raw_text', ''),
+            analysis.get('root_cause', 'See analysis')
+        )
+        cached = self._cached_prompt(key)
+        if cached is not None:
+            return cached
+        
+        incident_section = f"""# Incident
 {parsed_incident.get('raw_text', '')}
 
 # Root Cause
 {analysis.get('root_cause', 'See analysis')}
-
-# Your Task
-Create a detailed, actionable remediation plan:
-
-1. **Pre-checks** (What to verify before starting)
-   - Specific queries or checks to run
-   - What to look for
-
-2. **Remediation Steps** (Numbered, specific actions)
-   - Include exact SQL queries if database changes needed
-   - Include specific commands or procedures
-   - Each step should be clear and actionable
-
-3. **Expected Outcome** (For each step)
-   - What should happen after each step
-   - How to verify it worked
-
-4. **Verification Steps** (How to confirm the fix worked)
-   - Specific checks to perform
-   - Success criteria
-
-5. **Rollback Plan** (If something goes wrong)
-   - How to revert changes
-   - What to do if fix doesn't work
-
-6. **Monitoring** (What to watch after fix)
-   - Logs to monitor
-   - Metrics to track
-   - How long to monitor
-
-Be very specific. If you recommend a SQL query, write the actual query. If you recommend checking logs, specify which service and what to look for.
 """
         
-        return prompt
+        return self._store_prompt(key, self._build_messages(REMEDIATION_TEMPLATE_PREFIX, incident_section))
     
-    def _build_escalation_prompt(
+    def _build_escalation_messages(
         self,
         parsed_incident: Dict,
         analysis: Dict,
         remediation: Dict,
         recipient_type: str
-    ) -> str:
-        """Build prompt for escalation summary"""
+    ) -> list:
+        """
+        Build messages for escalation summary
         
-        if recipient_type.lower() == 'l3':
-            prompt = f"""Create a technical escalation summary for L3 Engineering team.
-
-# Incident
+        The L3 and management summaries of an incident share everything up
+        to the final audience instructions, so the provider's prompt cache
+        can reuse that prefix for the second summary.
+        """
+        
+        is_l3 = recipient_type.lower() == 'l3'
+        key = ResponseCache.make_key(
+            'escalation',
+            'l3' if is_l3 else 'management',
+            parsed_incident.get('raw_text', ''),
+            analysis.get('root_cause', ''),
+            analysis.get('impact', ''),
+            remediation.get('summary', '')
+        )
+        cached = self._cached_prompt(key)
+        if cached is not None:
+            return cached
+        
+        incident_section = f"""# Incident
 {parsed_incident.get('raw_text', '')}
 
 # Root Cause
 {analysis.get('root_cause', '')}
 
-# Remediation Plan
-{remediation.get('summary', '')}
-
-Create a concise email suitable for L3 engineers:
-
-Subject: [Clear, specific subject line]
-
-Body:
-- Brief incident description (2-3 sentences)
-- Root cause (technical details)
-- Immediate actions taken/needed
-- Technical details (error codes, affected services, log references)
-- Recommended fix with technical specifics
-- Verification steps
-- Any risks or dependencies
-
-Keep it technical, specific, and actionable. Engineers should know exactly what to do after reading this.
-"""
-        else:  # Management
-            prompt = f"""Create a business-focused escalation summary for Management.
-
-# Incident
-{parsed_incident.get('raw_text', '')}
-
 # Impact
 {analysis.get('impact', '')}
 
-# Status
-Root cause identified, resolution in progress.
-
-Create a concise email suitable for management:
-
-Subject: [Clear subject with business impact]
-
-Body:
-- What happened (business terms, 2-3 sentences)
-- Customer/business impact
-- Root cause (non-technical explanation)
-- Resolution timeline
-- Current status
-- Risk mitigation
-- Next steps
-
-Focus on business impact and timeline. Avoid technical jargon. Management should understand the business implications and timeline.
+# Remediation Plan
+{remediation.get('summary', '')}
 """
-        
-        return prompt
+        instructions = ESCALATION_L3_INSTRUCTIONS if is_l3 else ESCALATION_MGMT_INSTRUCTIONS
+        return self._store_prompt(key, [
+            {"role": "system", "content": PORTNET_SYSTEM_PROMPT},
+            {"role": "user", "content": incident_section},
+            {"role": "user", "content": instructions}
+        ])
     
-    def _format_context_for_prompt(self, context: Dict) -> str:
-        """Format gathered context for AI prompt"""
+    def _cached_prompt(self, key: str) -> Optional[list]:
+        """Previously built messages for a prompt key, if still cached"""
+        with self._prompt_lock:
+            return self._prompt_cache.get(key)
+    
+    def _store_prompt(self, key: str, messages: list) -> list:
+        """Cache built messages (shared between calls - treat as read-only)"""
+        with self._prompt_lock:
+            self._prompt_cache[key] = messages
+        return messages
+    
+    def _call_ai(
+        self,
+        messages: list,
+        max_tokens: int = 1500,
+        cache_ttl: Optional[float] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """
+        Call Azure OpenAI API and return the full response
         
-        formatted = "# Context Information\n\n"
+        The response is streamed and collected, so generation starts being
+        read as soon as the first tokens arrive.
         
-        # Log Analysis
-        if context.get('logs', {}).get('results'):
-            formatted += "## Application Logs\n"
-            log_analysis = context.get('log_analysis', {})
-            
-            formatted += f"- Total entries: {context['logs']['analysis'].get('total_entries', 0)}\n"
-            formatted += f"- Errors: {log_analysis.get('error_count', 0)}\n"
-            formatted += f"- Affected services: {', '.join(log_analysis.get('affected_services', []))}\n"
+        Args:
+            messages: Chat messages to send
+            max_tokens: Maximum tokens in response
+            cache_ttl: Seconds to cache the response for (None = don't cache)
+            temperature: Sampling temperature override (TEMPERATURE if omitted)
             
-            # Include top error messages
-            error_messages = log_analysis.get('error_messages', [])
-            if error_messages:
-                formatted += "\n### Key Error Messages:\n"
-                for i, error in enumerate(error_messages[:3], 1):
-                    formatted += f"{i}. [{error['service']}] {error['message']}\n"
+        Returns:
+            AI response text, or an AI_ERROR_PREFIX message if the call failed
+            (never part of a response followed by the error)
             
-            formatted += "\n"
-        
-        # Historical Cases
-        if context.get('historical_cases', {}).get('similar_cases'):
-            formatted += "## Similar Historical Cases\n"
-            for i, case_match in enumerate(context['historical_cases']['similar_cases'][:3], 1):
-                case = case_match['case']
-                formatted += f"\n### Case {i} (Similarity: {case_match['similarity']:.0%})\n"
-                formatted += f"Module: {case.get('Module', 'N/A')}\n"
-                formatted += f"Problem: {case.get('Problem Statements', 'N/A')[:200]}...\n"
-                formatted += f"Solution: {case.get('Solution', 'N/A')[:200]}...\n"
+        Raises:
+            TRANSIENT_ERRORS: Once retries and the fallback provider are exhausted
+        """
+        try:
+            return ''.join(self._call_ai_stream(messages, max_tokens, cache_ttl, temperature))
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            # The stream broke after its first chunks; drop the partial text
+            logger.error("AI response interrupted: %s", e)
+            return f"{AI_ERROR_PREFIX}. {str(e)}"
+    
+    async def _call_ai_async(
+        self,
+        messages: list,
+        max_tokens: int = 1500,
+        cache_ttl: Optional[float] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """
+        Call Azure OpenAI API without blocking the event loop
+        
+        Args:
+            messages: Chat messages to send
+            max_tokens: Maximum tokens in response
+            cache_ttl: Seconds to cache the response for (None = don't cache)
+            temperature: Sampling temperature override (TEMPERATURE if omitted)
             
-            formatted += "\n"
-        
-        # Knowledge Base
-        if context.get('knowledge_base', {}).get('articles'):
-            formatted += "## Knowledge Base Articles\n"
-            for i, article in enumerate(context['knowledge_base']['articles'][:2], 1):
-                formatted += f"\n### Article {i}: {article['section_title']}\n"
-                formatted += f"{article['content'][:300]}...\n"
+        Returns:
+            AI response text, or an AI_ERROR_PREFIX message if the call failed
             
-            formatted += "\n"
-        
-        return formatted
+        Raises:
+            TRANSIENT_ERRORS: Once retries and the fallback provider are exhausted
+        """
+        parts = []
+        try:
+            async for part in self._call_ai_stream_async(messages, max_tokens, cache_ttl, temperature):
+                parts.append(part)
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            logger.error("AI response interrupted: %s", e)
+            return f"{AI_ERROR_PREFIX}. {str(e)}"
+        return ''.join(parts)
     
-    def _call_ai(self, prompt: str, max_tokens: int = 1500) -> str:
+    def _call_ai_stream(
+        self,
+        messages: list,
+        max_tokens: int = 1500,
+        cache_ttl: Optional[float] = None,
+        temperature: Optional[float] = None
+    ) -> Iterator[str]:
         """
-        Call Azure OpenAI API
+        Call Azure OpenAI API with streaming enabled
         
         Args:
-            prompt: The prompt to send
+            messages: Chat messages to send
             max_tokens: Maximum tokens in response
+            cache_ttl: Seconds to cache the full response for (None = don't cache)
+            temperature: Sampling temperature override (TEMPERATURE if omitted)
             
-        Returns:
-            AI response text
+        Yields:
+            Response text chunks as they arrive, or a single AI_ERROR_PREFIX
+            message if the call fails before any text is received
+            
+        Raises:
+            TRANSIENT_ERRORS: Once retries and the fallback provider are exhausted
+            Exception: Any error after the first chunk, so it can't be read as
+                part of the response
         """
+        if temperature is None:
+            temperature = TEMPERATURE
+        cache_key = self._cache_key(messages, max_tokens, temperature) if cache_ttl else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert technical analyst for PORTNET maritime operations. Provide clear, actionable analysis and recommendations."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=max_tokens,
-                temperature=0.3
-            )
+            stream = self._create_completion(messages, max_tokens, temperature)
+            
+            for chunk in stream:
+                # Azure sends a leading chunk with no choices (content filter results)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+            
+            if cache_key and parts:
+                self.cache.set(cache_key, ''.join(parts), ttl=cache_ttl)
+            
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            if parts:
+                raise  # Text already went out; an error message now would read as part of it
+            if isinstance(e, FATAL_ERRORS):
+                logger.error("AI call rejected, check Azure OpenAI key/deployment: %s", e)
+            else:
+                logger.error("AI call failed: %s", e)
+            yield f"{AI_ERROR_PREFIX}. {str(e)}"
+    
+    async def _call_ai_stream_async(
+        self,
+        messages: list,
+        max_tokens: int = 1500,
+        cache_ttl: Optional[float] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Async streaming counterpart of _call_ai_stream()
+        
+        Yields:
+            Response text chunks as they arrive (see _call_ai_stream())
+            
+        Raises:
+            TRANSIENT_ERRORS: Once retries and the fallback provider are exhausted
+            Exception: Any error after the first chunk
+        """
+        if self.aclient is None:
+            # No async client (e.g. OpenAI fallback) - run the sync call in a thread
+            yield await asyncio.to_thread(self._call_ai, messages, max_tokens, cache_ttl, temperature)
+            return
+        
+        if temperature is None:
+            temperature = TEMPERATURE
+        cache_key = self._cache_key(messages, max_tokens, temperature) if cache_ttl else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        try:
+            stream = await self._create_completion_async(messages, max_tokens, temperature)
+            
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
             
-            return response.choices[0].message.content
+            if cache_key and parts:
+                self.cache.set(cache_key, ''.join(parts), ttl=cache_ttl)
             
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            if parts:
+                raise  # Text already went out; an error message now would read as part of it
+            if isinstance(e, FATAL_ERRORS):
+                logger.error("AI call rejected, check Azure OpenAI key/deployment: %s", e)
+            else:
+                logger.error("AI call failed: %s", e)
+            yield f"{AI_ERROR_PREFIX}. {str(e)}"
+    
+    def _call_ai_structured(self, messages: list, max_tokens: int) -> Optional[IncidentResolution]:
+        """
+        Call the model with IncidentResolution as the response format
+        
+        Transient errors are retried like _create_completion(), then sent to the
+        fallback provider. Results are kept in the response cache as JSON.
+        
+        Returns:
+            The parsed resolution, or None if the model refused
+        """
+        cache_key = self._cache_key(messages, max_tokens) + ':resolution'
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return IncidentResolution.model_validate_json(cached)
+        
+        request = {
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': TEMPERATURE,
+            'seed': self._seed(messages),
+            'response_format': IncidentResolution
+        }
+        try:
+            for attempt in Retrying(**RETRY_POLICY):
+                with attempt:
+                    completion = self.client.chat.completions.parse(model=self.deployment, **request)
+        except TRANSIENT_ERRORS:
+            if self.fallback_client is None:
+                raise
+            logger.warning("Azure OpenAI unavailable, using OpenAI fallback")
+            completion = self.fallback_client.chat.completions.parse(model=self.fallback_model, **request)
+        
+        resolution = completion.choices[0].message.parsed
+        if resolution is not None:
+            self.cache.set(cache_key, resolution.model_dump_json(), ttl=RESPONSE_CACHE_TTL['analysis'])
+        return resolution
+    
+    @staticmethod
+    def _render_sections(sections: BaseModel) -> str:
+        """Numbered markdown of a sections model, matching the staged prompts' format (empty sections skipped)"""
+        return '\n\n'.join(
+            f"{i}. **{field.title}**\n{getattr(sections, name)}"
+            for i, (name, field) in enumerate(type(sections).model_fields.items(), 1)
+            if getattr(sections, name)
+        )
+    
+    def _create_completion(self, messages: list, max_tokens: int, temperature: float):
+        """
+        Start a streamed completion, retrying transient errors with backoff
+        
+        Once the retries are used up the request goes to the fallback provider
+        (if configured); FATAL_ERRORS are raised straight away.
+        
+        Returns:
+            The completion stream
+        """
+        request = self._completion_request(messages, max_tokens, temperature)
+        try:
+            for attempt in Retrying(**RETRY_POLICY):
+                with attempt:
+                    return self.client.chat.completions.create(model=self.deployment, **request)
+        except TRANSIENT_ERRORS:
+            if self.fallback_client is None:
+                raise
+            logger.warning("Azure OpenAI unavailable, using OpenAI fallback")
+            return self.fallback_client.chat.completions.create(model=self.fallback_model, **request)
+    
+    async def _create_completion_async(self, messages: list, max_tokens: int, temperature: float):
+        """Async version of _create_completion()"""
+        request = self._completion_request(messages, max_tokens, temperature)
+        try:
+            async for attempt in AsyncRetrying(**RETRY_POLICY):
+                with attempt:
+                    return await self.aclient.chat.completions.create(model=self.deployment, **request)
+        except TRANSIENT_ERRORS:
+            if self.afallback_client is None:
+                raise
+            logger.warning("Azure OpenAI unavailable, using OpenAI fallback")
+            return await self.afallback_client.chat.completions.create(model=self.fallback_model, **request)
+    
+    def _completion_request(self, messages: list, max_tokens: int, temperature: float) -> Dict:
+        """Chat completion arguments shared by the primary and fallback providers"""
+        return {
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'seed': self._seed(messages),
+            'stream': True
+        }
+    
+    def _cache_key(self, messages: list, max_tokens: int, temperature: float = TEMPERATURE) -> str:
+        """Response cache key for a request (everything that affects the output)"""
+        return ResponseCache.make_key(
+            self.deployment,
+            max_tokens,
+            temperature,
+            json.dumps(messages, sort_keys=True)
+        )
+    
+    @staticmethod
+    def _seed(messages: list) -> int:
+        """Sampling seed derived from the prompt, so repeated prompts sample the same way"""
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode('utf-8'))
+        return int(digest.hexdigest()[:8], 16)
+    
+    @property
+    def cache_stats(self) -> Dict:
+        """Response cache hit/miss counters"""
+        return self.cache.stats
+    
+    def _historical_match(self, context: Dict) -> Optional[Dict]:
+        """
+        Top similar case when the CAG shortcut is on and the case is close enough
+        
+        The similarity is the TF-IDF cosine when ENABLE_TFIDF_CASE_SEARCH is on,
+        otherwise the fraction of incident keywords matched. A few generic
+        keywords can score 1.0 on the latter, so the case must also match at
+        least CAG_MIN_MATCHED_KEYWORDS of them and outscore the runner-up.
+        
+        Returns:
+            The similar_cases entry to answer from, or None to call the AI
+        """
+        if not self.cag_shortcut:
+            return None
+        similar = context.get('historical_cases', {}).get('similar_cases') or []
+        if not similar:
+            return None
+        top = similar[0]
+        if top.get('similarity', 0) < CAG_SIMILARITY_THRESHOLD:
+            return None
+        if len(top.get('matched_keywords', [])) < CAG_MIN_MATCHED_KEYWORDS:
+            return None
+        if len(similar) > 1 and similar[1].get('similarity', 0) >= top['similarity']:
+            # Tied cases - no single case to answer from
+            return None
+        return top
+    
+    @staticmethod
+    def _match_confidence(match: Dict) -> str:
+        """Confidence of an answer taken from a historical case, from how strong the match is"""
+        strong_similarity = (1 + CAG_SIMILARITY_THRESHOLD) / 2
+        if (match['similarity'] >= strong_similarity
+                and len(match.get('matched_keywords', [])) >= 2 * CAG_MIN_MATCHED_KEYWORDS):
+            return 'HIGH'
+        return 'MEDIUM'
+    
+    @staticmethod
+    def _case_field(case: Dict, field: str) -> str:
+        """Case log cell as text ('' for empty / NaN cells)"""
+        value = case.get(field)
+        if value is None or value != value:
+            return ''
+        return str(value)
+    
+    def _analysis_from_case(self, match: Dict) -> Dict:
+        """Analysis result built from a matching historical case"""
+        case = match['case']
+        logger.info("Serving analysis from historical case (similarity %.2f)", match['similarity'])
+        sections = AnalysisSections(
+            root_cause=self._case_field(case, 'Problem Statements'),
+            impact='',
+            evidence=(
+                f"Matched historical {self._case_field(case, 'Module')} case "
+                f"(similarity {match['similarity']:.2f}, keywords: {', '.join(match.get('matched_keywords', []))})"
+            ),
+            confidence=self._match_confidence(match)
+        )
+        analysis = sections.model_dump()
+        analysis['full_response'] = self._render_sections(sections)
+        analysis['_from_case_log'] = True
+        return analysis
+    
+    def _remediation_from_case(self, match: Dict) -> Dict:
+        """Remediation plan built from a matching historical case's solution / SOP"""
+        case = match['case']
+        logger.info("Serving remediation from historical case (similarity %.2f)", match['similarity'])
+        steps = self._case_field(case, 'Solution')
+        sop = self._case_field(case, 'SOP')
+        if sop:
+            steps = f"{steps}\n\nSOP: {sop}"
+        sections = RemediationSections(
+            pre_checks="Confirm the incident matches the historical case's problem statement.",
+            steps=steps,
+            expected_outcome='',
+            verification='',
+            rollback='',
+            monitoring=''
+        )
+        remediation = sections.model_dump()
+        full_response = self._render_sections(sections)
+        remediation['full_response'] = full_response
+        remediation['summary'] = full_response[:500] + '...' if len(full_response) > 500 else full_response
+        remediation['_from_case_log'] = True
+        return remediation
+    
+    @staticmethod
+    def is_error_response(text: str) -> bool:
+        """Whether text is the placeholder returned for a failed AI call"""
+        return isinstance(text, str) and text.startswith(AI_ERROR_PREFIX)
+    
+    def _cached_response(self, messages: list, max_tokens: int) -> Optional[str]:
+        """Exact-prompt response cache entry, checked before falling back to similarity"""
+        return self.cache.get(self._cache_key(messages, max_tokens), count_miss=False)
+    
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """
+        Embed text for the semantic caches
+        
+        Returns:
+            Embedding vector, or None if the caches are disabled or the call failed
+        """
+        if self.semantic_cache is None or not text:
+            return None
+        with self._embedding_lock:
+            embedding = self._embeddings.get(text)
+        if embedding is not None:
+            return embedding
+        try:
+            response = self.client.embeddings.create(model=self.embedding_deployment, input=text)
+            embedding = response.data[0].embedding
+        except Exception as e:
+            # The cache is an optimisation - never fail an analysis over it
+            logger.warning("Embedding failed, skipping semantic cache: %s", e)
+            return None
+        with self._embedding_lock:
+            self._embeddings[text] = embedding
+        return embedding
+    
+    async def _embed_async(self, text: str) -> Optional[List[float]]:
+        """Async version of _embed()"""
+        if self.semantic_cache is None or not text:
+            return None
+        if self.aclient is None:
+            return await asyncio.to_thread(self._embed, text)
+        with self._embedding_lock:
+            embedding = self._embeddings.get(text)
+        if embedding is not None:
+            return embedding
+        try:
+            response = await self.aclient.embeddings.create(model=self.embedding_deployment, input=text)
+            embedding = response.data[0].embedding
         except Exception as e:
-            print(f"❌ AI call failed: {e}")
-            return f"Error: Unable to get AI response. {str(e)}"
+            logger.warning("Embedding failed, skipping semantic cache: %s", e)
+            return None
+        with self._embedding_lock:
+            self._embeddings[text] = embedding
+        return embedding
+    
+    @staticmethod
+    def _semantic_lookup(cache: Optional[SemanticCache], embedding: Optional[List[float]], kind: str) -> Optional[str]:
+        """Cached response text for a similar incident, if any"""
+        if cache is None or embedding is None:
+            return None
+        response = cache.get(embedding)
+        if response is not None:
+            logger.info("Reusing %s of a near-identical incident", kind)
+        return response
+    
+    @staticmethod
+    def _semantic_store(cache: Optional[SemanticCache], embedding: Optional[List[float]], response: str):
+        """Remember a response for similar incidents (error responses are skipped)"""
+        if cache is None or embedding is None or not response or AIAnalyzer.is_error_response(response):
+            return
+        cache.set(embedding, response)
+    
+    def _build_messages(self, template_prefix: str, incident_section: str) -> list:
+        """
+        Assemble chat messages with the static blocks first
+        
+        Args:
+            template_prefix: Static task instructions (one of the *_PREFIX constants)
+            incident_section: Incident-specific details and context
+        """
+        return [
+            {"role": "system", "content": PORTNET_SYSTEM_PROMPT},
+            {"role": "user", "content": template_prefix},
+            {"role": "user", "content": incident_section}
+        ]
     
-    def _parse_analysis_response(self, response: str) -> Dict:
+    def parse_analysis_response(self, response: str) -> Dict:
         """
         Parse AI analysis response into structured format
         
@@ -363,17 +1341,12 @@ Focus on business impact and timeline. Avoid technical jargon. Management should
         Returns:
             Structured analysis dictionary
         """
-        sections = {
-            'root_cause': self._extract_section(response, ['root cause', '1.']),
-            'impact': self._extract_section(response, ['impact', '2.']),
-            'evidence': self._extract_section(response, ['evidence', '3.']),
-            'confidence': self._extract_section(response, ['confidence', '4.']),
-            'full_response': response
-        }
+        sections = self._pick_sections(response, self._ANALYSIS_SECTIONS)
+        sections['full_response'] = response
         
         return sections
     
-    def _parse_remediation_response(self, response: str) -> Dict:
+    def parse_remediation_response(self, response: str) -> Dict:
         """
         Parse remediation response into structured format
         
@@ -383,66 +1356,110 @@ Focus on business impact and timeline. Avoid technical jargon. Management should
         Returns:
             Structured remediation dictionary
         """
-        sections = {
-            'pre_checks': self._extract_section(response, ['pre-check', '1.']),
-            'steps': self._extract_section(response, ['remediation step', 'step', '2.']),
-            'verification': self._extract_section(response, ['verification', 'verify', '4.']),
-            'rollback': self._extract_section(response, ['rollback', '5.']),
-            'monitoring': self._extract_section(response, ['monitoring', 'monitor', '6.']),
-            'full_response': response,
-            'summary': response[:500] + '...' if len(response) > 500 else response
-        }
+        sections = self._pick_sections(response, self._REMEDIATION_SECTIONS)
+        sections['full_response'] = response
+        sections['summary'] = response[:500] + '...' if len(response) > 500 else response
         
         return sections
     
-    def _extract_section(self, text: str, markers: list) -> str:
+    def _pick_sections(self, response: str, wanted: tuple) -> Dict:
+        """Map (name, number) pairs to section bodies, preferring keyword headers"""
+        found = dict(self._split_sections(response))
+        return {name: found.get(name, found.get(number, '')) for name, number in wanted}
+    
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _split_sections(text: str) -> tuple:
         """
-        Extract a section from text based on markers
+        Split a response into sections in a single regex pass
+        
+        Sections are delimited by keyword headers (SECTION_TAGS); responses
+        without any are split on top-level numbered lines instead, tagged
+        '1', '2', ... Text after a colon on the header line (e.g.
+        "**Confidence Level**: HIGH") starts the section body.
         
         Args:
-            text: Full text
-            markers: List of possible section markers
+            text: Full response text
             
         Returns:
-            Extracted section or empty string
-        """
-        text_lower = text.lower()
-        
-        for marker in markers:
-            marker_lower = marker.lower()
-            if marker_lower in text_lower:
-                start = text_lower.find(marker_lower)
-                
-                # Find the next section
-                next_markers = ['\n#', '\n##', '\n1.', '\n2.', '\n3.', '\n4.', '\n5.', '\n6.']
-                end = len(text)
-                
-                for next_marker in next_markers:
-                    pos = text.find(next_marker, start + len(marker))
-                    if pos != -1 and pos < end:
-                        end = pos
-                
-                section = text[start:end].strip()
-                
-                # Remove the marker itself from the beginning
-                for m in markers:
-                    if section.lower().startswith(m.lower()):
-                        section = section[len(m):].strip()
-                        break
-                
-                return section
-        
-        return ""
+            Tuple of (section name, body) pairs; first occurrence wins
+        """
+        matches = [
+            m for m in _SECTION_RE.finditer(text)
+            if m.group('marker').strip() or _PLAIN_LABEL_RE.match(m.group('rest'))
+        ]
+        numbered = not matches
+        if numbered:
+            matches = list(_NUMBERED_RE.finditer(text))
+        
+        sections = {}
+        for i, match in enumerate(matches):
+            if numbered:
+                tag = match.group('tag')
+            else:
+                tag = SECTION_TAGS[match.group('tag').lower()]
+            if tag in sections:
+                continue
+            
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            body = text[match.end():end].strip()
+            
+            rest = match.group('rest')
+            if numbered:
+                # "1. The cause is ..." - the numbered line itself is content
+                inline = rest.strip(' *\t')
+            elif ':' in rest:
+                # Inline value after the header, e.g. "Confidence Level**: HIGH"
+                inline = rest.split(':', 1)[1].strip(' *\t')
+            else:
+                inline = ''
+            if inline:
+                body = f"{inline}\n{body}".strip()
+            
+            sections[tag] = body
+        
+        return tuple(sections.items())
     
     def test_connection(self) -> bool:
         """
         Test AI connection
         
+        A success is trusted for CONNECTION_CHECK_TTL seconds - across runs
+        too when RESPONSE_CACHE_DIR is set - so repeated checks skip the ping.
+        
         Returns:
             True if connection successful
         """
+        marker = self._health_marker()
+        if marker is not None:
+            try:
+                self._connection_ok_at = max(self._connection_ok_at, marker.stat().st_mtime)
+            except OSError:
+                pass  # No earlier success recorded
+        if time.time() - self._connection_ok_at < CONNECTION_CHECK_TTL:
+            return True
+        
         try:
-            response = self._call_ai("Respond with: Connection successful", max_tokens=50)
-            return "successful" in response.lower()
+            response = self._call_ai(
+                [{"role": "user", "content": "Respond with: Connection successful"}],
+                max_tokens=50
+            )
+            ok = "successful" in response.lower()
         except:
-            return False
\ No newline at end of file
+            return False
+        
+        if ok:
+            self._connection_ok_at = time.time()
+            if marker is not None:
+                try:
+                    marker.touch()
+                except OSError:
+                    pass  # Read-only cache directory - remember it in memory only
+        return ok
+    
+    def _health_marker(self) -> Optional[Path]:
+        """File whose mtime records the last successful ping, if responses persist"""
+        if not RESPONSE_CACHE_DIR:
+            return None
+        key = ResponseCache.make_key(AZURE_OPENAI_CONFIG['endpoint'], self.deployment)
+        return Path(RESPONSE_CACHE_DIR) / f"health-{key[:16]}"
\ No newline at end of file
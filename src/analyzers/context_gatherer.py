@@ -1,7 +1,12 @@
 """
 Context Gatherer - Searches all data sources for relevant information
 """
-from typing import Dict, List
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from cachetools import LRUCache
 from parsers import (
     CaseLogParser,
     KnowledgeBaseParser,
@@ -12,48 +17,198 @@ from utils.config import (
     CASE_LOG_FILE,
     KNOWLEDGE_BASE_FILE,
     ESCALATION_CONTACTS_FILE,
-    LOG_FILES
+    LOG_FILES,
+    AI_CONTEXT_TOKEN_BUDGET,
+    SEARCH_TERM_LIMIT,
+    ENABLE_TFIDF_CASE_SEARCH
 )
+from utils.tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Distinct incidents whose gathered context each ContextGatherer keeps
+GATHER_CACHE_SIZE = 64
+
+# Entity types most likely to pinpoint the failing record come first
+PRIORITY_ORDER = ('container', 'error_code', 'vessel', 'booking', 'reference', 'email')
+
+
+def format_context_for_prompt(context: Dict, token_budget: Optional[int] = None) -> str:
+    """
+    Format gathered context for AI prompt within a token budget
+    
+    Error messages, similar cases and KB articles are ranked by relevance
+    and added greedily until the budget is used up; each snippet is cut to
+    a fixed number of tokens.
+    
+    Args:
+        context: Gathered context from ContextGatherer
+        token_budget: Max context tokens (defaults to AI_CONTEXT_TOKEN_BUDGET)
+    
+    Returns:
+        Markdown context block
+    """
+    if token_budget is None:
+        token_budget = AI_CONTEXT_TOKEN_BUDGET
+    
+    # Log statistics are short and always included
+    log_header = []
+    if context.get('logs', {}).get('results'):
+        log_analysis = context.get('log_analysis') or {}
+        log_header = [
+            "## Application Logs\n",
+            f"- Total entries: {context['logs']['analysis'].get('total_entries', 0)}\n",
+            f"- Errors: {log_analysis.get('error_count', 0)}\n",
+            f"- Affected services: {', '.join(log_analysis.get('affected_services', []))}\n"
+        ]
+    used = count_tokens(''.join(log_header))
+    
+    # Candidates: (score, section, order, text). Errors are direct evidence,
+    # so they outrank cases (similarity) and articles (relevance), both 0-1.
+    candidates = []
+    if log_header:
+        error_messages = (context.get('log_analysis') or {}).get('error_messages', [])
+        for i, error in enumerate(error_messages[:3]):
+            message = truncate_tokens(error['message'], 60)
+            candidates.append((2.0 - i * 0.01, 'errors', i, f"[{error['service']}] {message}"))
+    
+    for i, case_match in enumerate(context.get('historical_cases', {}).get('similar_cases', [])[:3]):
+        case = case_match['case']
+        text = (
+            f"Module: {case.get('Module', 'N/A')}\n"
+            f"Problem: {truncate_tokens(str(case.get('Problem Statements', 'N/A')), 50)}\n"
+            f"Solution: {truncate_tokens(str(case.get('Solution', 'N/A')), 50)}\n"
+        )
+        candidates.append((case_match['similarity'], 'cases', i, (case_match['similarity'], text)))
+    
+    for i, article in enumerate(context.get('knowledge_base', {}).get('articles', [])[:2]):
+        text = f"{truncate_tokens(article['content'], 75)}\n"
+        candidates.append((article.get('relevance', 0), 'articles', i, (article['section_title'], text)))
+    
+    selected = {'errors': [], 'cases': [], 'articles': []}
+    for score, section, order, item in sorted(candidates, key=lambda c: -c[0]):
+        cost = count_tokens(item if isinstance(item, str) else item[1])
+        if used + cost > token_budget:
+            continue
+        used += cost
+        selected[section].append((order, item))
+    
+    # Rebuild in the usual section order
+    parts = ["# Context Information\n\n"]
+    
+    if log_header:
+        parts.extend(log_header)
+        if selected['errors']:
+            parts.append("\n### Key Error Messages:\n")
+            for n, (_, text) in enumerate(sorted(selected['errors']), 1):
+                parts.append(f"{n}. {text}\n")
+        parts.append("\n")
+    
+    if selected['cases']:
+        parts.append("## Similar Historical Cases\n")
+        for n, (_, (similarity, text)) in enumerate(sorted(selected['cases']), 1):
+            parts.append(f"\n### Case {n} (Similarity: {similarity:.0%})\n{text}")
+        parts.append("\n")
+    
+    if selected['articles']:
+        parts.append("## Knowledge Base Articles\n")
+        for n, (_, (title, text)) in enumerate(sorted(selected['articles']), 1):
+            parts.append(f"\n### Article {n}: {title}\n{text}")
+        parts.append("\n")
+    
+    return ''.join(parts)
 
 
 class ContextGatherer:
     """Gather relevant context from all data sources"""
     
-    def __init__(self):
-        """Initialize all parsers"""
-        print("🔄 Initializing Context Gatherer...")
+    def __init__(self, parallel: bool = True):
+        """
+        Initialize all parsers
         
-        self.case_log_parser = CaseLogParser(CASE_LOG_FILE)
+        Args:
+            parallel: Query the four data sources concurrently in gather()
+        """
+        logger.info("Initializing Context Gatherer")
+        
+        self.parallel = parallel
+        self.case_log_parser = CaseLogParser(CASE_LOG_FILE, use_tfidf=ENABLE_TFIDF_CASE_SEARCH)
         self.kb_parser = KnowledgeBaseParser(KNOWLEDGE_BASE_FILE)
         self.contacts_parser = EscalationContactsParser(ESCALATION_CONTACTS_FILE)
         self.log_parser = ApplicationLogParser(LOG_FILES)
         
-        print("✅ Context Gatherer ready")
+        # Parsers aren't written to be thread-safe: sources run side by side,
+        # but concurrent gather() calls take turns on each parser
+        self._locks = {
+            'logs': threading.Lock(),
+            'cases': threading.Lock(),
+            'kb': threading.Lock(),
+            'contacts': threading.Lock()
+        }
+        self._gather_cache = LRUCache(maxsize=GATHER_CACHE_SIZE)
+        self._gather_lock = threading.Lock()
+        
+        logger.info("Context Gatherer ready")
     
     def gather(self, parsed_incident: Dict) -> Dict:
         """
         Gather all relevant context for an incident
         
+        Incidents with the same search terms, keywords, module and severity
+        get the cached context of the first gather (same object), so callers
+        must not modify it.
+        
         Args:
             parsed_incident: Parsed incident from IncidentParser
             
         Returns:
             Dictionary with all gathered context
         """
-        print("\n🔍 Gathering context from all sources...")
-        
         # Extract search terms
         search_terms = self._get_search_terms(parsed_incident)
         keywords = parsed_incident.get('keywords', [])
         module = parsed_incident.get('module', 'General')
         severity = parsed_incident.get('severity', 'MEDIUM')
         
+        # Everything the lookups below depend on
+        key = (tuple(search_terms), tuple(keywords), module, severity)
+        with self._gather_lock:
+            context = self._gather_cache.get(key)
+        if context is None:
+            context = self._gather_uncached(search_terms, keywords, module, severity)
+            with self._gather_lock:
+                self._gather_cache[key] = context
+        return context
+    
+    def _gather_uncached(self, search_terms: List[str], keywords: List[str],
+                         module: str, severity: str) -> Dict:
+        """Query every data source for an incident, bypassing the cache (see gather)"""
+        logger.debug("Gathering context from all sources")
+        
+        if self.parallel:
+            # Sources are independent - overlap their lookups
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                f_logs = executor.submit(self._locked, 'logs', self._search_logs, search_terms)
+                f_cases = executor.submit(self._locked, 'cases', self._search_cases, keywords, module)
+                f_kb = executor.submit(self._locked, 'kb', self._search_kb, keywords)
+                f_contacts = executor.submit(
+                    self._locked, 'contacts', self._get_escalation_contacts, module, severity
+                )
+                logs, cases, kb, contacts = (
+                    f_logs.result(), f_cases.result(), f_kb.result(), f_contacts.result()
+                )
+        else:
+            logs = self._locked('logs', self._search_logs, search_terms)
+            cases = self._locked('cases', self._search_cases, keywords, module)
+            kb = self._locked('kb', self._search_kb, keywords)
+            contacts = self._locked('contacts', self._get_escalation_contacts, module, severity)
+        
         context = {
             'search_terms': search_terms,
-            'logs': self._search_logs(search_terms),
-            'historical_cases': self._search_cases(keywords, module),
-            'knowledge_base': self._search_kb(keywords),
-            'escalation_contacts': self._get_escalation_contacts(module, severity),
+            'logs': logs,
+            'historical_cases': cases,
+            'knowledge_base': kb,
+            'escalation_contacts': contacts,
             'log_analysis': None,  # Will be filled by log analysis
         }
         
@@ -61,21 +216,51 @@ class ContextGatherer:
         if context['logs']['results']:
             context['log_analysis'] = self._analyze_logs(context['logs'])
         
-        print(f"✅ Context gathered: {self._get_context_summary(context)}")
+        # Formatted once here and reused by every AI stage
+        context['_formatted'] = format_context_for_prompt(context)
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Context gathered: %s", self._get_context_summary(context))
         
         return context
     
-    def _get_search_terms(self, parsed_incident: Dict) -> List[str]:
-        """Extract search terms from parsed incident"""
-        search_terms = []
+    async def gather_async(self, parsed_incident: Dict) -> Dict:
+        """Run gather() in a worker thread so batch callers can await it"""
+        return await asyncio.to_thread(self.gather, parsed_incident)
+    
+    def _locked(self, source: str, func, *args):
+        """Call func while holding the lock for the given data source"""
+        with self._locks[source]:
+            return func(*args)
+    
+    def _get_search_terms(self, parsed_incident: Dict,
+                          max_terms: Optional[int] = None) -> List[str]:
+        """
+        Extract search terms from parsed incident
         
-        # Get all entity values
+        Args:
+            parsed_incident: Output of IncidentParser.parse()
+            max_terms: Cap on the number of terms (SEARCH_TERM_LIMIT if omitted)
+            
+        Returns:
+            Unique entity values, highest-priority entity types first
+        """
+        if max_terms is None:
+            max_terms = SEARCH_TERM_LIMIT
         entities = parsed_incident.get('entities', {})
-        for entity_list in entities.values():
-            search_terms.extend(entity_list)
         
-        # Remove duplicates
-        return list(set(search_terms))
+        # Known types in priority order, then anything else the parser found
+        entity_types = [t for t in PRIORITY_ORDER if t in entities]
+        entity_types += [t for t in entities if t not in PRIORITY_ORDER]
+        
+        # Ordered dedupe keeps the term list (and cache keys built on it) stable
+        seen = {}
+        for entity_type in entity_types:
+            for value in entities[entity_type]:
+                seen.setdefault(value, None)
+                if len(seen) >= max_terms:
+                    return list(seen)
+        return list(seen)
     
     def _search_logs(self, search_terms: List[str]) -> Dict:
         """
@@ -90,36 +275,22 @@ class ContextGatherer:
         if not search_terms:
             return {'results': {}, 'summary': 'No search terms'}
         
-        print(f"   📄 Searching logs for: {', '.join(search_terms[:3])}...")
-        
-        # Search all logs
-        results = self.log_parser.search_logs(search_terms)
-        
-        # Get errors only
-        errors = self.log_parser.get_errors_only(search_terms)
-        
-        # Get warnings
-        warnings = self.log_parser.get_warnings_only(search_terms)
-        
-        # Build timeline
-        timeline = self.log_parser.build_timeline(search_terms)
+        logger.debug("Searching logs for: %s", search_terms[:3])
         
-        # Get affected services
-        affected_services = self.log_parser.get_affected_services(search_terms)
-        
-        # Analyze patterns
-        analysis = self.log_parser.analyze_patterns(search_terms)
+        # One search, all derived views (errors, warnings, timeline, patterns)
+        scan = self.log_parser.scan(search_terms)
+        results = scan['results']
         
         total_entries = sum(len(entries) for entries in results.values())
-        print(f"   ✓ Found {total_entries} log entries across {len(results)} services")
+        logger.debug("Found %d log entries across %d services", total_entries, len(results))
         
         return {
             'results': results,
-            'errors': errors,
-            'warnings': warnings,
-            'timeline': timeline[:20],  # Top 20 chronological events
-            'affected_services': affected_services,
-            'analysis': analysis,
+            'errors': scan['errors'],
+            'warnings': scan['warnings'],
+            'timeline': scan['timeline'][:20],  # Top 20 chronological events
+            'affected_services': scan['affected_services'],
+            'analysis': scan['analysis'],
             'summary': f"{total_entries} entries in {len(results)} services"
         }
     
@@ -134,7 +305,7 @@ class ContextGatherer:
         Returns:
             Dictionary with case search results
         """
-        print(f"   📚 Searching historical cases...")
+        logger.debug("Searching historical cases")
         
         # Search by keywords
         similar_cases = self.case_log_parser.search_similar(keywords, top_n=5)
@@ -142,7 +313,7 @@ class ContextGatherer:
         # Search by module
         module_cases = self.case_log_parser.search_by_module(module)
         
-        print(f"   ✓ Found {len(similar_cases)} similar cases")
+        logger.debug("Found %d similar cases", len(similar_cases))
         
         return {
             'similar_cases': similar_cases,
@@ -161,7 +332,7 @@ class ContextGatherer:
         Returns:
             Dictionary with KB search results
         """
-        print(f"   📖 Searching knowledge base...")
+        logger.debug("Searching knowledge base")
         
         # Search by keywords
         articles = self.kb_parser.search_by_keywords(keywords)
@@ -169,7 +340,7 @@ class ContextGatherer:
         # Search for procedures
         procedures = self.kb_parser.search_procedures(keywords)
         
-        print(f"   ✓ Found {len(articles)} relevant articles")
+        logger.debug("Found %d relevant articles", len(articles))
         
         return {
             'articles': articles[:5],  # Top 5
@@ -189,12 +360,12 @@ class ContextGatherer:
         Returns:
             Dictionary with escalation contacts
         """
-        print(f"   👥 Finding escalation contacts for {module}/{severity}...")
+        logger.debug("Finding escalation contacts for %s/%s", module, severity)
         
         # Route incident to appropriate contacts
         contacts = self.contacts_parser.route_incident(module, severity)
         
-        print(f"   ✓ Found {len(contacts)} contacts")
+        logger.debug("Found %d contacts", len(contacts))
         
         return {
             'contacts': contacts,
@@ -275,45 +446,4 @@ class ContextGatherer:
         Returns:
             Formatted string for AI prompt
         """
-        formatted = "# Context Information\n\n"
-        
-        # Log Analysis
-        if context['logs']['results']:
-            formatted += "## Application Logs\n"
-            log_analysis = context.get('log_analysis', {})
-            
-            formatted += f"- Total entries: {context['logs']['analysis'].get('total_entries', 0)}\n"
-            formatted += f"- Errors: {log_analysis.get('error_count', 0)}\n"
-            formatted += f"- Affected services: {', '.join(log_analysis.get('affected_services', []))}\n"
-            
-            # Include top error messages
-            error_messages = log_analysis.get('error_messages', [])
-            if error_messages:
-                formatted += "\n### Key Error Messages:\n"
-                for i, error in enumerate(error_messages[:3], 1):
-                    formatted += f"{i}. [{error['service']}] {error['message']}\n"
-            
-            formatted += "\n"
-        
-        # Historical Cases
-        if context['historical_cases']['similar_cases']:
-            formatted += "## Similar Historical Cases\n"
-            for i, case_match in enumerate(context['historical_cases']['similar_cases'][:3], 1):
-                case = case_match['case']
-                formatted += f"\n### Case {i} (Similarity: {case_match['similarity']:.0%})\n"
-                formatted += f"Module: {case.get('Module', 'N/A')}\n"
-                formatted += f"Problem: {case.get('Problem Statements', 'N/A')[:200]}...\n"
-                formatted += f"Solution: {case.get('Solution', 'N/A')[:200]}...\n"
-            
-            formatted += "\n"
-        
-        # Knowledge Base
-        if context['knowledge_base']['articles']:
-            formatted += "## Knowledge Base Articles\n"
-            for i, article in enumerate(context['knowledge_base']['articles'][:2], 1):
-                formatted += f"\n### Article {i}: {article['section_title']}\n"
-                formatted += f"{article['content'][:300]}...\n"
-            
-            formatted += "\n"
-        
-        return formatted
\ No newline at end of file
+        return format_context_for_prompt(context)
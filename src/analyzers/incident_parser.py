@@ -1,51 +1,248 @@
 """
 Incident Parser - Extracts entities and information from incident reports
 """
+import hashlib
+import os
 import re
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Set
 from datetime import datetime
+from cachetools import LRUCache
+
+try:
+    import ahocorasick
+except ImportError:  # optional dependency
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:  # optional dependency
+    hyperscan = None
+
+# Distinct incident texts whose parse results each IncidentParser keeps
+PARSE_CACHE_SIZE = 256
+
+# Entity type -> regex source, matched case-insensitively
+ENTITY_PATTERNS = {
+    # Container number: XXXX1234567
+    'container': r'\b[A-Z]{4}\d{7}\b',
+    
+    # Vessel name: MV VESSEL NAME or MV VESSEL NAME/07E
+    'vessel': r'MV\s+[A-Z][A-Z\s]+(?:/\d+[A-Z]?)?',
+    
+    # Error codes: VESSEL_ERR_4, EDI_ERR_1
+    'error_code': r'[A-Z_]+ERR[_-]\d+',
+    
+    # Reference IDs: REF-IFT-@@@7, TCK-123456, INC-123456
+    'reference': r'(?:REF|TCK|INC|ALR|SMS)-[A-Z0-9@-]+',
+    
+    # Email addresses
+    'email': r'[\w\.-]+@[\w\.-]+\.\w+',
+    
+    # Booking references: BK-XXXXXXX
+    'booking': r'BK-[A-Z0-9]+',
+}
+
+# Text every match of an entity type contains (lowercased, ASCII texts only);
+# None for types without such a literal
+_ENTITY_LITERALS = {
+    'container': None,
+    'vessel': ('mv',),
+    'error_code': ('err',),
+    'reference': ('ref-', 'tck-', 'inc-', 'alr-', 'sms-'),
+    'email': ('@',),
+    'booking': ('bk-',),
+}
+
+# Error codes used as search keywords, e.g. VESSEL_ERR_4 (case-sensitive)
+_ERROR_CODE_RE = re.compile(r'[A-Z_]+ERR[_-]\d+')
+
+# Keyword rules, checked in order - the first group with a hit wins
+INCIDENT_TYPE_RULES = (
+    ('duplicate_entry', ('duplicate', 'duplicated', 'two identical')),
+    ('stuck_process', ('stuck', 'error status', 'not acknowledged')),
+    ('data_inconsistency', ('inconsistency', 'mismatch', 'conflicting')),
+    ('timeout', ('timeout', 'timed out', 'not responding')),
+    ('creation_failure', ('unable to create', 'cannot create', 'creation failed')),
+)
+GENERAL_ERROR_WORDS = ('failed', 'failure', 'error')
+
+MODULE_RULES = (
+    ('EDI/API', ('edi', 'edifact', 'codeco', 'baplie', 'coarri')),
+    ('Vessel', ('vessel', 'ship', 'berth', 'arrival', 'departure')),
+    ('Container', ('container', 'cntr')),
+    ('Booking', ('booking', 'bk-')),
+    ('Database', ('database', 'db', 'query', 'sql')),
+)
+
+SEVERITY_RULES = (
+    ('CRITICAL', ('urgent', 'critical', 'immediately', 'production down', 'outage')),
+    ('HIGH', ('high priority', 'multiple', 'affecting customers', 'business impact')),
+    ('LOW', ('minor', 'low priority', 'cosmetic', 'display only')),
+)
+
+# Common technical keywords to look for
+KEYWORD_PATTERNS = (
+    'duplicate', 'error', 'failed', 'timeout', 'stuck',
+    'inconsistency', 'mismatch', 'conflict', 'invalid',
+    'missing', 'not found', 'unable', 'cannot',
+    'vessel', 'container', 'edi', 'api', 'database',
+    'booking', 'advice', 'message', 'acknowledgment'
+)
+
+
+class _KeywordMatcher:
+    """
+    Finds which of a fixed set of keywords occur anywhere in a text
+    
+    Uses a single Aho-Corasick pass when pyahocorasick is installed. Without
+    it, each keyword is one C-level substring search - still far cheaper than
+    a Python-level regex scan, and every keyword is checked once per text no
+    matter how many rules mention it.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+    
+    def find(self, text_lower: str) -> Set[str]:
+        """Keywords occurring in (already lowercased) text"""
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text_lower)}
+        return {keyword for keyword in self.keywords if keyword in text_lower}
+
+
+class _EntityPrefilter:
+    """
+    Reports which entity patterns match anywhere in a text, in one SIMD
+    scan when the hyperscan package is installed
+    
+    Hyperscan reports match ends rather than re's leftmost, non-overlapping
+    matches, so it only narrows extraction down to the entity types that
+    occur (or skips it when none do); the values still come from re.
+    """
+    
+    def __init__(self, patterns: Dict[str, str]):
+        self.entity_types = tuple(patterns)
+        self._db = None
+        if hyperscan is None:
+            return
+        
+        flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+                 | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+        db = hyperscan.Database()
+        try:
+            db.compile(
+                expressions=[pattern.encode('utf-8') for pattern in patterns.values()],
+                ids=list(range(len(patterns))),
+                elements=len(patterns),
+                flags=[flags] * len(patterns)
+            )
+        except Exception:
+            return  # Pattern not supported by this Hyperscan build - use re alone
+        self._db = db
+    
+    @property
+    def available(self) -> bool:
+        """Whether scans go through Hyperscan"""
+        return self._db is not None
+    
+    def present(self, text: str) -> Set[str]:
+        """Entity types with at least one match in text"""
+        hits = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            hits.add(self.entity_types[pattern_id])
+        
+        self._db.scan(text.encode('utf-8'), match_event_handler=on_match)
+        return hits
+
+
+_ALL_KEYWORDS = (
+    [word for _, words in INCIDENT_TYPE_RULES for word in words]
+    + list(GENERAL_ERROR_WORDS)
+    + [word for _, words in MODULE_RULES for word in words]
+    + [word for _, words in SEVERITY_RULES for word in words]
+    + list(KEYWORD_PATTERNS)
+    # Entity literals ride along, so one keyword sweep also drives the entity prefilter
+    + [needle for needles in _ENTITY_LITERALS.values() if needles for needle in needles]
+)
+
+# Below this many texts, process start-up costs more than parsing serially
+PARSE_POOL_MIN_TEXTS = 64
+
+
+# Compiled once per process and shared by every IncidentParser
+_ENTITY_RES = {
+    entity_type: re.compile(pattern, re.IGNORECASE)
+    for entity_type, pattern in ENTITY_PATTERNS.items()
+}
+
+
+# Per-process parser used by parse_many() workers
+_worker_parser = None
+
+
+def _init_worker():
+    """Build the worker's own parser (Hyperscan databases can't be pickled or shared)"""
+    global _worker_parser
+    _worker_parser = IncidentParser()
+
+
+def _parse_in_worker(text: str) -> Dict:
+    """Parse one text with the worker's parser"""
+    return _worker_parser.parse(text)
 
 
 class IncidentParser:
     """Parse incident text and extract key entities"""
     
     def __init__(self):
-        """Initialize parser with entity patterns"""
-        self.patterns = {
-            # Container number: XXXX1234567
-            'container': r'\b[A-Z]{4}\d{7}\b',
-            
-            # Vessel name: MV VESSEL NAME or MV VESSEL NAME/07E
-            'vessel': r'MV\s+[A-Z][A-Z\s]+(?:/\d+[A-Z]?)?',
-            
-            # Error codes: VESSEL_ERR_4, EDI_ERR_1
-            'error_code': r'[A-Z_]+ERR[_-]\d+',
-            
-            # Reference IDs: REF-IFT-@@@7, TCK-123456, INC-123456
-            'reference': r'(REF|TCK|INC|ALR|SMS)-[A-Z0-9@-]+',
-            
-            # Email addresses
-            'email': r'[\w\.-]+@[\w\.-]+\.\w+',
-            
-            # Booking references: BK-XXXXXXX
-            'booking': r'BK-[A-Z0-9]+',
-        }
+        """Initialize parser (entity regexes are compiled once, at import)"""
+        self.patterns = _ENTITY_RES
+        self._prefilter = _EntityPrefilter(ENTITY_PATTERNS)
+        self._keywords = _KeywordMatcher(_ALL_KEYWORDS)
+        # Text digest -> parse result; the same alert is often parsed more than once
+        self._parse_cache = LRUCache(maxsize=PARSE_CACHE_SIZE)
+        self._parse_lock = threading.Lock()
     
     def parse(self, incident_text: str) -> Dict:
         """
         Parse incident text and extract all relevant information
         
+        Repeated texts return the cached result of the first parse (same
+        object, same parsed_at), so callers must not modify it.
+        
         Args:
             incident_text: Raw incident report text
             
         Returns:
             Dictionary with parsed incident information
         """
-        entities = self._extract_entities(incident_text)
-        incident_type = self._classify_incident(incident_text, entities)
-        module = self._identify_module(incident_text, entities)
-        severity = self._estimate_severity(incident_text)
-        keywords = self._extract_keywords(incident_text)
+        key = hashlib.blake2b(incident_text.encode('utf-8'), digest_size=16).digest()
+        with self._parse_lock:
+            parsed = self._parse_cache.get(key)
+        if parsed is None:
+            parsed = self._parse_uncached(incident_text)
+            with self._parse_lock:
+                self._parse_cache[key] = parsed
+        return parsed
+    
+    def _parse_uncached(self, incident_text: str) -> Dict:
+        """Parse incident text without consulting the cache (see parse)"""
+        # One keyword pass shared by entities, classification, module, severity and keywords
+        found = self._keywords.find(incident_text.lower())
+        entities = self._extract_entities(incident_text, found)
+        incident_type = self._classify_incident(incident_text, entities, found)
+        module = self._identify_module(incident_text, entities, found)
+        severity = self._estimate_severity(incident_text, found)
+        keywords = self._extract_keywords(incident_text, found)
         
         return {
             'raw_text': incident_text,
@@ -57,149 +254,163 @@ class IncidentParser:
             'parsed_at': datetime.now().isoformat()
         }
     
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def parse_many(self, texts: Sequence[str], workers: Optional[int] = None) -> List[Dict]:
+        """
+        Parse many incident texts, spread over worker processes
+        
+        Args:
+            texts: Raw incident report texts
+            workers: Worker processes (defaults to the CPU count)
+            
+        Returns:
+            Parsed incidents, in the same order as texts
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(texts) < PARSE_POOL_MIN_TEXTS:
+            return [self.parse(text) for text in texts]
+        
+        # Workers build their own parser rather than receiving this one, so
+        # nothing is pickled per task and each has its own Hyperscan scratch
+        chunksize = max(1, len(texts) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            return list(executor.map(_parse_in_worker, texts, chunksize=chunksize))
+    
+    def _extract_entities(self, text: str, found: Optional[Set[str]] = None) -> Dict[str, List[str]]:
         """
         Extract all entities from text using regex patterns
         
         Args:
             text: Incident text
+            found: Keywords present in the text (computed if omitted)
             
         Returns:
             Dictionary of entity types to lists of found values
         """
-        entities = {}
+        # Each type is scanned on its own: their patterns overlap (an email can
+        # contain a container number or booking reference), and matches of one
+        # type must not hide another's
+        present = None
+        if self._prefilter.available:
+            present = self._prefilter.present(text)
+            if not present:
+                return {}
+        elif text.isascii():
+            # Leave out the types whose literal is absent. Case-insensitive
+            # matching of non-ASCII text can involve characters that don't
+            # lowercase to the literal, so only ASCII texts are filtered.
+            if found is None:
+                found = self._keywords.find(text.lower())
+            present = {
+                entity_type for entity_type, needles in _ENTITY_LITERALS.items()
+                if needles is None or found.intersection(needles)
+            }
         
+        entities = {}
         for entity_type, pattern in self.patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                # Remove duplicates while preserving order
-                unique_matches = list(dict.fromkeys(matches))
-                entities[entity_type] = unique_matches
+            if present is not None and entity_type not in present:
+                continue
+            # Remove duplicates while preserving order
+            values = list(dict.fromkeys(match.group() for match in pattern.finditer(text)))
+            if values:
+                entities[entity_type] = values
         
         return entities
     
-    def _classify_incident(self, text: str, entities: Dict) -> str:
+    def _classify_incident(self, text: str, entities: Dict, found: Optional[Set[str]] = None) -> str:
         """
         Classify the type of incident
         
         Args:
             text: Incident text
             entities: Extracted entities
+            found: Keywords present in the text (computed if omitted)
             
         Returns:
             Incident type classification
         """
-        text_lower = text.lower()
+        if found is None:
+            found = self._keywords.find(text.lower())
         
         # Check for specific keywords
-        if any(word in text_lower for word in ['duplicate', 'duplicated', 'two identical']):
-            return 'duplicate_entry'
-        
-        if any(word in text_lower for word in ['stuck', 'error status', 'not acknowledged']):
-            return 'stuck_process'
-        
-        if any(word in text_lower for word in ['inconsistency', 'mismatch', 'conflicting']):
-            return 'data_inconsistency'
-        
-        if any(word in text_lower for word in ['timeout', 'timed out', 'not responding']):
-            return 'timeout'
-        
-        if any(word in text_lower for word in ['unable to create', 'cannot create', 'creation failed']):
-            return 'creation_failure'
+        for incident_type, words in INCIDENT_TYPE_RULES:
+            if found.intersection(words):
+                return incident_type
         
         if 'error_code' in entities:
             return 'error_code_incident'
         
-        if any(word in text_lower for word in ['failed', 'failure', 'error']):
+        if found.intersection(GENERAL_ERROR_WORDS):
             return 'general_error'
         
         return 'unknown'
     
-    def _identify_module(self, text: str, entities: Dict) -> str:
+    def _identify_module(self, text: str, entities: Dict, found: Optional[Set[str]] = None) -> str:
         """
         Identify which module/system is affected
         
         Args:
             text: Incident text
             entities: Extracted entities
+            found: Keywords present in the text (computed if omitted)
             
         Returns:
             Module name
         """
-        text_lower = text.lower()
+        if found is None:
+            found = self._keywords.find(text.lower())
         
         # Check for module keywords
-        if any(word in text_lower for word in ['edi', 'edifact', 'codeco', 'baplie', 'coarri']):
-            return 'EDI/API'
-        
-        if any(word in text_lower for word in ['vessel', 'ship', 'berth', 'arrival', 'departure']):
-            return 'Vessel'
-        
-        if 'container' in entities or any(word in text_lower for word in ['container', 'cntr']):
-            return 'Container'
-        
-        if any(word in text_lower for word in ['booking', 'bk-']):
-            return 'Booking'
-        
-        if any(word in text_lower for word in ['database', 'db', 'query', 'sql']):
-            return 'Database'
+        for module, words in MODULE_RULES:
+            if found.intersection(words) or (module == 'Container' and 'container' in entities):
+                return module
         
         return 'General'
     
-    def _estimate_severity(self, text: str) -> str:
+    def _estimate_severity(self, text: str, found: Optional[Set[str]] = None) -> str:
         """
         Estimate incident severity based on keywords
         
         Args:
             text: Incident text
+            found: Keywords present in the text (computed if omitted)
             
         Returns:
             Severity level: LOW, MEDIUM, HIGH, CRITICAL
         """
-        text_lower = text.lower()
-        
-        # Critical keywords
-        if any(word in text_lower for word in ['urgent', 'critical', 'immediately', 'production down', 'outage']):
-            return 'CRITICAL'
+        if found is None:
+            found = self._keywords.find(text.lower())
         
-        # High severity keywords
-        if any(word in text_lower for word in ['high priority', 'multiple', 'affecting customers', 'business impact']):
-            return 'HIGH'
-        
-        # Low severity keywords
-        if any(word in text_lower for word in ['minor', 'low priority', 'cosmetic', 'display only']):
-            return 'LOW'
+        for severity, words in SEVERITY_RULES:
+            if found.intersection(words):
+                return severity
         
         # Default to MEDIUM
         return 'MEDIUM'
     
-    def _extract_keywords(self, text: str) -> List[str]:
+    def _extract_keywords(self, text: str, found: Optional[Set[str]] = None) -> List[str]:
         """
         Extract relevant keywords for searching
         
         Args:
             text: Incident text
+            found: Keywords present in the text (computed if omitted)
             
         Returns:
             List of keywords
         """
-        # Common technical keywords to look for
-        keyword_patterns = [
-            'duplicate', 'error', 'failed', 'timeout', 'stuck',
-            'inconsistency', 'mismatch', 'conflict', 'invalid',
-            'missing', 'not found', 'unable', 'cannot',
-            'vessel', 'container', 'edi', 'api', 'database',
-            'booking', 'advice', 'message', 'acknowledgment'
-        ]
-        
-        text_lower = text.lower()
-        found_keywords = [kw for kw in keyword_patterns if kw in text_lower]
+        if found is None:
+            found = self._keywords.find(text.lower())
+        
+        found_keywords = [kw for kw in KEYWORD_PATTERNS if kw in found]
         
         # Add error codes as keywords
-        error_codes = re.findall(r'[A-Z_]+ERR[_-]\d+', text)
+        error_codes = _ERROR_CODE_RE.findall(text)
+        if not error_codes:
+            return found_keywords  # KEYWORD_PATTERNS has no repeats
         found_keywords.extend(error_codes)
         
-        return list(set(found_keywords))  # Remove duplicates
+        # Remove duplicates, keeping a stable order so prompts and cache keys repeat
+        return list(dict.fromkeys(found_keywords))
     
     def get_search_terms(self, parsed_incident: Dict) -> List[str]:
         """
@@ -222,7 +433,7 @@ class IncidentParser:
         keywords = parsed_incident.get('keywords', [])
         search_terms.extend(keywords)
         
-        return list(set(search_terms))  # Remove duplicates
+        return list(dict.fromkeys(search_terms))  # Remove duplicates, keep order
     
     def format_summary(self, parsed_incident: Dict) -> str:
         """
@@ -236,7 +447,7 @@ class IncidentParser:
         """
         entities = parsed_incident.get('entities', {})
         
-        summary = f"""
+        parts = [f"""
 Incident Summary
 ================
 Type: {parsed_incident.get('incident_type', 'Unknown')}
@@ -244,13 +455,15 @@ Module: {parsed_incident.get('module', 'Unknown')}
 Severity: {parsed_incident.get('severity', 'MEDIUM')}
 
 Entities Found:
-"""
+"""]
         
-        for entity_type, values in entities.items():
-            summary += f"  {entity_type}: {', '.join(values)}\n"
+        parts.extend(
+            f"  {entity_type}: {', '.join(values)}\n"
+            for entity_type, values in entities.items()
+        )
         
         keywords = parsed_incident.get('keywords', [])
         if keywords:
-            summary += f"\nKeywords: {', '.join(keywords[:10])}"
+            parts.append(f"\nKeywords: {', '.join(keywords[:10])}")
         
-        return summary
\ No newline at end of file
+        return ''.join(parts)
\ No newline at end of file
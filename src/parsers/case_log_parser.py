@@ -2,37 +2,81 @@
 Parser for Case Log Excel file
 Extracts historical incidents and their solutions
 """
+from itertools import compress
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional
+from .file_cache import load_cached
+from .text_index import TokenIndex
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:  # optional dependency
+    TfidfVectorizer = None
 
 
 class CaseLogParser:
     """Parse and search historical case log"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, use_tfidf: bool = False):
         """
         Initialize parser with Excel file path
         
         Args:
             file_path: Path to Case Log.xlsx
+            use_tfidf: Rank search_similar() by TF-IDF cosine similarity
+                (needs scikit-learn) instead of the fraction of keywords matched
         """
         self.file_path = file_path
-        self.cases = None
+        self._df = None
+        self._cases = None
+        self.index = None
+        self._module_lower = None
+        self._tfidf = None
         self._load_cases()
+        if use_tfidf:
+            self._build_tfidf()
     
     def _load_cases(self):
-        """Load cases from Excel file"""
+        """Load cases from Excel file (or its cached DataFrame)"""
         try:
-            df = pd.read_excel(self.file_path)
+            self._df = load_cached(self.file_path, lambda: pd.read_excel(self.file_path))
             
-            # Convert to list of dictionaries for easier processing
-            self.cases = df.to_dict('records')
+            # Problem + solution text is what keyword searches look at
+            self.index = TokenIndex([
+                f"{problem} {solution}"
+                for problem, solution in zip(self._column('Problem Statements'), self._column('Solution'))
+            ])
+            # Lowercased Module column, compared as a whole by search_by_module
+            self._module_lower = np.array([str(module).lower() for module in self._column('Module')], dtype=object)
             
-            print(f"✓ Loaded {len(self.cases)} historical cases")
+            print(f"✓ Loaded {len(self._df)} historical cases")
             
         except Exception as e:
             raise Exception(f"Failed to load case log: {str(e)}")
     
+    def _build_tfidf(self):
+        """Fit a TF-IDF model over the problem + solution texts"""
+        if TfidfVectorizer is None:
+            print("⚠ scikit-learn not installed, ranking similar cases by keyword matches")
+            return
+        vectorizer = TfidfVectorizer(lowercase=True, ngram_range=(1, 2), min_df=1)
+        matrix = vectorizer.fit_transform(self.index.texts)
+        self._tfidf = (vectorizer, matrix)
+    
+    def _column(self, name: str) -> List:
+        """Values of a column, or empty strings if the sheet lacks it"""
+        if name in self._df.columns:
+            return self._df[name].tolist()
+        return [''] * len(self._df)
+    
+    @property
+    def cases(self) -> List[Dict]:
+        """Cases as dictionaries, built from the DataFrame on first use"""
+        if self._cases is None and self._df is not None:
+            self._cases = self._df.to_dict('records')
+        return self._cases
+    
     def get_all_cases(self) -> List[Dict]:
         """
         Get all cases
@@ -55,24 +99,21 @@ class CaseLogParser:
         if not keywords:
             return []
         
-        matching_cases = []
+        # Case id -> keywords its problem/solution text contains, in query order;
+        # built from the index's hit sets so work scales with hits, not cases
+        matched: Dict[int, List[str]] = {}
+        for keyword in keywords:
+            for case_id in self.index.matching(keyword):
+                matched.setdefault(case_id, []).append(keyword)
         
-        for case in self.cases:
-            # Combine problem and solution text for searching
-            problem_text = str(case.get('Problem Statements', '')).lower()
-            solution_text = str(case.get('Solution', '')).lower()
-            combined_text = f"{problem_text} {solution_text}"
-            
-            # Count keyword matches
-            matches = sum(1 for keyword in keywords if keyword.lower() in combined_text)
-            
-            if matches > 0:
-                similarity_score = matches / len(keywords)
-                matching_cases.append({
-                    'case': case,
-                    'similarity': similarity_score,
-                    'matched_keywords': [k for k in keywords if k.lower() in combined_text]
-                })
+        matching_cases = []
+        for case_id in sorted(matched):
+            matched_keywords = matched[case_id]
+            matching_cases.append({
+                'case': self.cases[case_id],
+                'similarity': len(matched_keywords) / len(keywords),
+                'matched_keywords': matched_keywords
+            })
         
         # Sort by similarity score
         matching_cases.sort(key=lambda x: x['similarity'], reverse=True)
@@ -89,10 +130,8 @@ class CaseLogParser:
         Returns:
             List of cases from that module
         """
-        return [
-            case for case in self.cases
-            if str(case.get('Module', '')).lower() == module.lower()
-        ]
+        mask = self._module_lower == module.lower()
+        return list(compress(self.cases, mask))
     
     def search_similar(self, incident_keywords: List[str], top_n: int = 3) -> List[Dict]:
         """
@@ -105,8 +144,45 @@ class CaseLogParser:
         Returns:
             Top N most similar cases
         """
-        matches = self.search_by_keywords(incident_keywords)
-        return matches[:top_n]
+        if self._tfidf is None:
+            matches = self.search_by_keywords(incident_keywords)
+            return matches[:top_n]
+        return self._search_tfidf(incident_keywords, top_n)
+    
+    def _search_tfidf(self, keywords: List[str], top_n: int) -> List[Dict]:
+        """
+        Rank cases by cosine similarity between their TF-IDF vectors and the keywords
+        
+        Args:
+            keywords: Keywords from current incident
+            top_n: Number of top matches to return
+            
+        Returns:
+            Top N cases with a non-zero score, best first
+        """
+        top_n = min(top_n, len(self.index.texts))
+        if not keywords or top_n <= 0:
+            return []
+        
+        vectorizer, matrix = self._tfidf
+        query = vectorizer.transform([' '.join(keywords)])
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        scores = (matrix @ query.T).toarray().ravel()
+        
+        # Only the top N need ordering
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        
+        matches = []
+        for case_id in top:
+            if scores[case_id] <= 0:
+                break
+            matches.append({
+                'case': self.cases[case_id],
+                'similarity': float(scores[case_id]),
+                'matched_keywords': [k for k in keywords if case_id in self.index.matching(k)]
+            })
+        return matches
     
     def get_case_summary(self, case: Dict) -> str:
         """
@@ -135,7 +211,7 @@ SOP: {case.get('SOP', 'N/A')}
         if not self.cases:
             return {}
         
-        df = pd.DataFrame(self.cases)
+        df = self._df
         
         return {
             'total_cases': len(self.cases),
@@ -3,9 +3,43 @@ Parser for Product Team Escalation Contacts PDF
 Extracts contact information for different modules and roles
 """
 import re
+from operator import itemgetter
 from PyPDF2 import PdfReader
 from typing import List, Dict, Optional
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional dependency
+    pdfium = None
+
+_EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+# Singapore format, e.g. +65 6123 4567
+_PHONE_RE = re.compile(r'\+65\s*\d{4}\s*\d{4}')
+# "Name (Role)" or "Name - Role"
+_ROLE_PAREN_RE = re.compile(r'[\(\-]\s*([^)]+)[\)]?')
+_HEADER_PREFIX_RE = re.compile(r'^(Module|Team):\s*', re.IGNORECASE)
+
+# Common module header markers (matched case-insensitively as plain substrings)
+_HEADER_TOKENS = frozenset({
+    'module:', 'team:', 'edi', 'vessel', 'container', 'database', 'infrastructure', 'management'
+})
+
+# Role words that split "Name Role" text; checked in order, first hit wins
+_ROLE_INDICATORS = ('Lead', 'Engineer', 'Specialist', 'Manager', 'Owner', 'DBA', 'L3')
+
+# Escalation order used by route_incident (lowercase role substrings, first hit wins)
+_ROUTING_PRIORITY = ('l3 engineer', 'engineer', 'lead', 'specialist', 'owner', 'manager')
+_UNRANKED = 999
+
+
+def _role_priority(role: str) -> int:
+    """Position of a role in the escalation order (_UNRANKED if it has none)"""
+    role = role.lower()
+    for i, priority_role in enumerate(_ROUTING_PRIORITY):
+        if priority_role in role:
+            return i
+    return _UNRANKED
+
 
 class EscalationContactsParser:
     """Parse and route escalation contacts"""
@@ -25,12 +59,7 @@ class EscalationContactsParser:
     def _load_contacts(self):
         """Load and parse PDF"""
         try:
-            reader = PdfReader(self.file_path)
-            
-            # Extract text from all pages
-            full_text = ""
-            for page in reader.pages:
-                full_text += page.extract_text() + "\n"
+            full_text = '\n'.join(self._read_pages())
             
             # Parse contacts from text
             self._parse_contacts(full_text)
@@ -40,6 +69,26 @@ class EscalationContactsParser:
         except Exception as e:
             raise Exception(f"Failed to load escalation contacts: {str(e)}")
     
+    def _read_pages(self) -> List[str]:
+        """
+        Extract the text of each PDF page
+        
+        Uses PDFium (pypdfium2) when it is installed, as it is much faster
+        than PyPDF2's pure-Python extractor.
+        
+        Returns:
+            Page texts in document order
+        """
+        if pdfium is not None:
+            pdf = pdfium.PdfDocument(str(self.file_path))
+            try:
+                return [pdf[i].get_textpage().get_text_range() for i in range(len(pdf))]
+            finally:
+                pdf.close()
+        
+        reader = PdfReader(self.file_path)
+        return [page.extract_text() for page in reader.pages]
+    
     def _parse_contacts(self, text: str):
         """
         Parse contact information from text
@@ -70,7 +119,9 @@ class EscalationContactsParser:
                     self.contacts_by_module[current_module] = []
                 continue
             
-            # Try to extract contact information
+            # Try to extract contact information (every contact has an email)
+            if '@' not in line:
+                continue
             contact = self._extract_contact_from_line(line)
             if contact and current_module:
                 contact['module'] = current_module
@@ -79,23 +130,13 @@ class EscalationContactsParser:
     
     def _is_module_header(self, line: str) -> bool:
         """Check if line is a module header"""
-        # Common patterns for module headers
-        patterns = [
-            r'Module:',
-            r'Team:',
-            r'EDI',
-            r'Vessel',
-            r'Container',
-            r'Database',
-            r'Infrastructure',
-            r'Management'
-        ]
-        return any(re.search(pattern, line, re.IGNORECASE) for pattern in patterns)
+        lowered = line.lower()
+        return any(token in lowered for token in _HEADER_TOKENS)
     
     def _extract_module_name(self, line: str) -> str:
         """Extract module name from header line"""
         # Remove common prefixes
-        line = re.sub(r'^(Module|Team):\s*', '', line, flags=re.IGNORECASE)
+        line = _HEADER_PREFIX_RE.sub('', line)
         return line.strip()
     
     def _extract_contact_from_line(self, line: str) -> Optional[Dict]:
@@ -111,12 +152,12 @@ class EscalationContactsParser:
         contact = {}
         
         # Extract email
-        email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', line)
+        email_match = _EMAIL_RE.search(line)
         if email_match:
             contact['email'] = email_match.group()
         
         # Extract phone number (Singapore format)
-        phone_match = re.search(r'\+65\s*\d{4}\s*\d{4}', line)
+        phone_match = _PHONE_RE.search(line)
         if phone_match:
             contact['phone'] = phone_match.group()
         
@@ -125,11 +166,8 @@ class EscalationContactsParser:
             # Name is usually before email
             name_part = line.split(contact['email'])[0].strip()
             
-            # Role indicators
-            role_indicators = ['Lead', 'Engineer', 'Specialist', 'Manager', 'Owner', 'DBA', 'L3']
-            
             # Try to split name and role
-            for indicator in role_indicators:
+            for indicator in _ROLE_INDICATORS:
                 if indicator in name_part:
                     parts = name_part.split(indicator)
                     if len(parts) == 2:
@@ -140,13 +178,16 @@ class EscalationContactsParser:
             # If role not found, check common patterns
             if 'role' not in contact:
                 # Check for patterns like "Name (Role)" or "Name - Role"
-                role_match = re.search(r'[\(\-]\s*([^)]+)[\)]?', name_part)
+                role_match = _ROLE_PAREN_RE.search(name_part)
                 if role_match:
                     contact['role'] = role_match.group(1).strip()
                     contact['name'] = name_part.split(role_match.group(0))[0].strip()
                 else:
                     contact['name'] = name_part
                     contact['role'] = 'Unknown'
+            
+            # Routing rank, worked out once here rather than on every sort
+            contact['_priority'] = _role_priority(contact['role'])
         
         return contact if 'email' in contact else None
     
@@ -204,16 +245,7 @@ class EscalationContactsParser:
             contacts.extend(mgmt_contacts)
         
         # Prioritize by role
-        priority_order = ['L3 Engineer', 'Engineer', 'Lead', 'Specialist', 'Owner', 'Manager']
-        
-        def get_priority(contact):
-            role = contact.get('role', '').lower()
-            for i, priority_role in enumerate(priority_order):
-                if priority_role.lower() in role:
-                    return i
-            return 999
-        
-        contacts.sort(key=get_priority)
+        contacts.sort(key=itemgetter('_priority'))
         
         return contacts
     
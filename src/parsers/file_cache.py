@@ -0,0 +1,48 @@
+"""
+On-disk cache for parsed source documents
+"""
+import pickle
+from pathlib import Path
+from typing import Any, Callable
+
+CACHE_DIR_NAME = '.cache'
+
+
+def _cache_path(file_path: Path) -> Path:
+    """Sidecar path keyed by the source file's mtime and size"""
+    stat = file_path.stat()
+    return file_path.parent / CACHE_DIR_NAME / f"{file_path.name}.{stat.st_mtime_ns}-{stat.st_size}.pkl"
+
+
+def load_cached(file_path, build: Callable[[], Any]) -> Any:
+    """
+    Return the parsed form of file_path, reusing a pickle sidecar when the
+    file has not changed since it was written
+
+    Args:
+        file_path: Source document (Excel, DOCX, ...)
+        build: Parses the source document; its result must be picklable
+
+    Returns:
+        The cached or freshly built value
+    """
+    file_path = Path(file_path)
+    cache = _cache_path(file_path)
+    if cache.exists():
+        try:
+            with open(cache, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass  # Corrupt or written by an incompatible version - rebuild
+
+    value = build()
+    try:
+        cache.parent.mkdir(exist_ok=True)
+        # Sidecars for older versions of the file are never read again
+        for stale in cache.parent.glob(f"{file_path.name}.*.pkl"):
+            stale.unlink()
+        with open(cache, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # Read-only data directory - just skip caching
+    return value
@@ -4,6 +4,11 @@ Extracts known issues, procedures, and solutions
 """
 from docx import Document
 from typing import List, Dict, Optional
+from .file_cache import load_cached
+from .text_index import TokenIndex
+
+# Markers of numbered steps or procedure text in a section
+_PROC_INDICATORS = ('step', 'procedure', 'sop', '1.', '2.')
 
 
 class KnowledgeBaseParser:
@@ -18,35 +23,54 @@ class KnowledgeBaseParser:
         """
         self.file_path = file_path
         self.content = None
-        self.sections = []
+        self.index = None
+        # Sections are kept as parallel columns; self.sections zips them on demand
+        self._titles: List[str] = []
+        self._contents: List[str] = []
+        self._sections: Optional[List[Dict]] = None
+        # Lowercased copies for case-insensitive lookups, made once at load
+        self._content_lower = ''
+        self._titles_lower: List[str] = []
         self._load_document()
     
     def _load_document(self):
         """Load and parse Word document"""
         try:
-            doc = Document(self.file_path)
-            
-            # Extract all paragraphs
-            paragraphs = []
-            for para in doc.paragraphs:
-                text = para.text.strip()
-                if text:
-                    paragraphs.append({
-                        'text': text,
-                        'style': para.style.name
-                    })
+            paragraphs = load_cached(self.file_path, self._read_paragraphs)
             
             # Combine into full content
             self.content = '\n'.join([p['text'] for p in paragraphs])
             
             # Try to identify sections based on headings
             self._extract_sections(paragraphs)
+            self.index = TokenIndex([f"{title} {content}" for title, content in zip(self._titles, self._contents)])
+            self._content_lower = self.content.lower()
+            self._titles_lower = [title.lower() for title in self._titles]
             
-            print(f"✓ Loaded knowledge base: {len(paragraphs)} paragraphs, {len(self.sections)} sections")
+            print(f"✓ Loaded knowledge base: {len(paragraphs)} paragraphs, {len(self._titles)} sections")
             
         except Exception as e:
             raise Exception(f"Failed to load knowledge base: {str(e)}")
     
+    def _read_paragraphs(self) -> List[Dict]:
+        """
+        Read the non-empty paragraphs of the document
+        
+        Returns:
+            List of paragraph dictionaries with text and style name
+        """
+        doc = Document(self.file_path)
+        
+        paragraphs = []
+        for para in doc.paragraphs:
+            text = para.text.strip()
+            if text:
+                paragraphs.append({
+                    'text': text,
+                    'style': para.style.name
+                })
+        return paragraphs
+    
     def _extract_sections(self, paragraphs: List[Dict]):
         """
         Extract sections based on headings
@@ -62,10 +86,7 @@ class KnowledgeBaseParser:
             if 'Heading' in para['style']:
                 # Save previous section
                 if current_section:
-                    self.sections.append({
-                        'title': current_section,
-                        'content': '\n'.join(current_content)
-                    })
+                    self._add_section(current_section, current_content)
                 
                 # Start new section
                 current_section = para['text']
@@ -77,10 +98,23 @@ class KnowledgeBaseParser:
         
         # Add last section
         if current_section:
-            self.sections.append({
-                'title': current_section,
-                'content': '\n'.join(current_content)
-            })
+            self._add_section(current_section, current_content)
+    
+    def _add_section(self, title: str, content: List[str]):
+        """Append a section to the title/content columns"""
+        self._titles.append(title)
+        self._contents.append('\n'.join(content))
+        self._sections = None
+    
+    @property
+    def sections(self) -> List[Dict]:
+        """Sections as title/content dictionaries, built on first use"""
+        if self._sections is None:
+            self._sections = [
+                {'title': title, 'content': content}
+                for title, content in zip(self._titles, self._contents)
+            ]
+        return self._sections
     
     def get_full_content(self) -> str:
         """
@@ -107,34 +141,27 @@ class KnowledgeBaseParser:
         matches = []
         
         # Search in sections if available
-        if self.sections:
-            for section in self.sections:
-                title = section['title'].lower()
-                content = section['content'].lower()
-                combined = f"{title} {content}"
-                
-                # Count matches
-                keyword_matches = sum(1 for kw in keywords if kw.lower() in combined)
-                
-                if keyword_matches > 0:
-                    relevance = keyword_matches / len(keywords)
-                    matches.append({
-                        'section_title': section['title'],
-                        'content': section['content'],
-                        'relevance': relevance,
-                        'matched_keywords': [k for k in keywords if k.lower() in combined]
-                    })
+        if self._titles:
+            # Keyword -> ids of sections whose title/content contains it
+            hits = [self.index.matching(kw) for kw in keywords]
+            for section_id in sorted(set().union(*hits)):
+                matched_keywords = [k for k, ids in zip(keywords, hits) if section_id in ids]
+                matches.append({
+                    'section_title': self._titles[section_id],
+                    'content': self._contents[section_id],
+                    'relevance': len(matched_keywords) / len(keywords),
+                    'matched_keywords': matched_keywords
+                })
         else:
             # Fallback: search in full content
-            content_lower = self.content.lower()
-            keyword_matches = sum(1 for kw in keywords if kw.lower() in content_lower)
+            matched_keywords = [k for k in keywords if k.lower() in self._content_lower]
             
-            if keyword_matches > 0:
+            if matched_keywords:
                 matches.append({
                     'section_title': 'Full Document',
                     'content': self.content,
-                    'relevance': keyword_matches / len(keywords),
-                    'matched_keywords': [k for k in keywords if k.lower() in content_lower]
+                    'relevance': len(matched_keywords) / len(keywords),
+                    'matched_keywords': matched_keywords
                 })
         
         # Sort by relevance
@@ -159,7 +186,8 @@ class KnowledgeBaseParser:
         for match in matches:
             content = match['content']
             # Look for numbered steps or procedure indicators
-            if any(indicator in content.lower() for indicator in ['step', 'procedure', 'sop', '1.', '2.']):
+            content_lower = content.lower()
+            if any(indicator in content_lower for indicator in _PROC_INDICATORS):
                 procedures.append(content)
         
         return procedures
@@ -174,9 +202,10 @@ class KnowledgeBaseParser:
         Returns:
             Section dictionary or None
         """
-        for section in self.sections:
-            if title.lower() in section['title'].lower():
-                return section
+        title = title.lower()
+        for section_id, section_title in enumerate(self._titles_lower):
+            if title in section_title:
+                return self.sections[section_id]
         return None
     
     def get_all_sections(self) -> List[Dict]:
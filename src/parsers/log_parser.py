@@ -2,15 +2,224 @@
 Parser for Application Log files
 Searches and analyzes log entries for incidents
 """
+import multiprocessing
+import os
 import re
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List, Dict, Optional
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
+from cachetools import LRUCache
+from .mapped_lines import MappedLines, open_lines
+
+try:
+    import ahocorasick
+except ImportError:  # optional dependency
+    ahocorasick = None
+
+# Log format: 2025-10-09T08:25:33.050Z INFO api-event-service Boot version=1.0.0
+_TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z)')
+_LEVEL_RE = re.compile(r'\s(DEBUG|INFO|WARN|ERROR)\s')
+_SERVICE_RE = re.compile(r'(INFO|ERROR|WARN|DEBUG)\s+(\S+)\s')
+# Timestamp, level and component of a well-formed line in one anchored match
+_LINE_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z)\s(DEBUG|INFO|WARN|ERROR)\s+(\S+)\s'
+)
+
+# Entities mentioned in log messages
+_CONTAINER_RE = re.compile(r'\b[A-Z]{4}\d{7}\b')
+_VESSEL_RE = re.compile(r'MV\s+[A-Z\s]+(?:/\d+[A-Z]?)?')
+_ERROR_CODE_RE = re.compile(r'[A-Z]+_ERR_\d+')
+_REFERENCE_RE = re.compile(r'REF-[A-Z]+-[^\s]+')
+
+# Distinct (search terms, levels) results kept by ApplicationLogParser
+SEARCH_CACHE_SIZE = 32
+
+# Below this many memory-mapped log lines in total, handing them to worker
+# processes costs more than scanning serially
+PARALLEL_SCAN_MIN_LINES = 200_000
+
+# Searches run in threads (ContextGatherer, Streamlit), where forking is unsafe
+_POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# With this few terms, plain substring checks beat building an automaton
+AUTOMATON_MIN_TERMS = 3
+
+# Searches keep entries as plain tuples in this field order; dicts are
+# only built for the callers that return them
+_ENTRY_FIELDS = ('line_num', 'timestamp', 'level', 'component', 'message')
+_LEVEL = 2
+_MESSAGE = 4
+
+
+def _parse_line(line: str, line_num: int) -> Tuple:
+    """Parse one log line into an _ENTRY_FIELDS tuple (see ApplicationLogParser._parse_log_line)"""
+    # Well-formed lines need a single match. The timestamp holds no
+    # whitespace, so the level right after it is also where the separate
+    # level and component searches below would first match.
+    line_match = _LINE_RE.match(line)
+    if line_match:
+        timestamp, level, component = line_match.groups()
+        message = line[line_match.end():].strip()
+    else:
+        # Extract timestamp
+        timestamp_match = _TIMESTAMP_RE.match(line)
+        timestamp = timestamp_match.group(1) if timestamp_match else None
+        
+        # Extract log level
+        level_match = _LEVEL_RE.search(line)
+        level = level_match.group(1) if level_match else 'UNKNOWN'
+        
+        # Extract service name (component)
+        service_match = _SERVICE_RE.search(line)
+        component = service_match.group(2) if service_match else 'unknown'
+        
+        # Extract message (everything after the component)
+        if service_match:
+            message_start = service_match.end()
+            message = line[message_start:].strip()
+        else:
+            message = line.strip()
+    
+    return (line_num, timestamp, level, component, message)
+
+
+def _to_dict(entry: Tuple, **extra) -> Dict:
+    """Entry tuple as the dict the public API returns, plus any extra keys"""
+    return dict(zip(_ENTRY_FIELDS, entry), **extra)
+
+
+def _build_automaton(search_terms: List[str]):
+    """
+    Aho-Corasick automaton over the search terms, or None to use plain
+    substring checks (pyahocorasick missing, or too few terms to pay off)
+    """
+    if ahocorasick is None or len(search_terms) < AUTOMATON_MIN_TERMS or '' in search_terms:
+        return None
+    automaton = ahocorasick.Automaton()
+    for term in search_terms:
+        automaton.add_word(term, term)
+    automaton.make_automaton()
+    return automaton
+
+
+def _lines_with_terms(log_lines: List[str], search_terms: List[str],
+                      levels: Optional[Tuple[str, ...]] = None) -> Iterator[Tuple[int, str]]:
+    """
+    (line number, line) for every line containing a search term, in file order
+    
+    When levels are given, lines that don't contain any level name are
+    dropped too, since they can't parse to one of those levels.
+    """
+    if isinstance(log_lines, MappedLines):
+        # UTF-8 is self-synchronising, so byte containment equals str containment
+        encoded = [term.encode('utf-8') for term in search_terms]
+        if levels:
+            # Level names (ERROR, WARN) are usually far rarer than the terms, so
+            # find those lines first and check the terms on each of them
+            encoded_levels = [level.encode('utf-8') for level in levels]
+            for index in log_lines.lines_containing(encoded_levels):
+                raw = log_lines.raw_line(index)
+                for term in encoded:
+                    if term in raw:
+                        yield index + 1, raw.decode('utf-8')
+                        break
+            return
+        
+        if not any(b'\n' in term for term in encoded):
+            for index in log_lines.lines_containing(encoded):
+                yield index + 1, log_lines.raw_line(index).decode('utf-8')
+            return
+        
+        # A term spanning a line break can only match at a line's end; check per line
+        for line_num, raw in enumerate(log_lines.raw_lines(), 1):
+            for term in encoded:
+                if term in raw:
+                    yield line_num, raw.decode('utf-8')
+                    break
+        return
+    
+    automaton = _build_automaton(search_terms)
+    if automaton is None and not levels and len(search_terms) == 1:
+        # Common single-term search: one inline containment check per line
+        term = search_terms[0]
+        for line_num, line in enumerate(log_lines, 1):
+            if term in line:
+                yield line_num, line
+        return
+    
+    # Explicit for/break loops below avoid building an any() generator per line
+    for line_num, line in enumerate(log_lines, 1):
+        if levels:
+            for level in levels:
+                if level in line:
+                    break
+            else:
+                continue
+        # Check if any search term is in this line
+        if automaton is not None:
+            if next(automaton.iter(line), None) is not None:
+                yield line_num, line
+            continue
+        for term in search_terms:
+            if term in line:
+                yield line_num, line
+                break
+
+
+def _scan_service(log_lines: List[str], search_terms: List[str],
+                  levels: Optional[Tuple[str, ...]] = None) -> List[Tuple]:
+    """
+    Parsed entries of one service's log lines that contain a search term
+    
+    Module-level so it can run in a worker process.
+    
+    Args:
+        log_lines: Lines of the service's log file
+        search_terms: Terms to search for
+        levels: Log levels to keep (all levels if omitted)
+        
+    Returns:
+        Matching entry tuples in file order
+    """
+    matches = []
+    for line_num, line in _lines_with_terms(log_lines, search_terms, levels):
+        parsed_entry = _parse_line(line, line_num)
+        if not levels or parsed_entry[_LEVEL] in levels:
+            matches.append(parsed_entry)
+    return matches
 
 
 class ApplicationLogParser:
     """Parse and search application logs"""
     
+    # Shared instances by log file set (see get_or_create)
+    _instance_cache: Dict[frozenset, 'ApplicationLogParser'] = {}
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def get_or_create(cls, log_files: Dict[str, Path]) -> 'ApplicationLogParser':
+        """
+        Parser for log_files, loading the logs only the first time per process
+        
+        Use _load_all_logs() on the returned parser to pick up changed files.
+        
+        Args:
+            log_files: Dictionary mapping service names to file paths
+            
+        Returns:
+            The shared parser for this set of log files
+        """
+        key = frozenset(log_files.items())
+        with cls._instance_lock:
+            if key not in cls._instance_cache:
+                cls._instance_cache[key] = cls(log_files)
+            return cls._instance_cache[key]
+    
     def __init__(self, log_files: Dict[str, Path]):
         """
         Initialize parser with log file paths
@@ -20,46 +229,171 @@ class ApplicationLogParser:
         """
         self.log_files = log_files
         self.logs_cache = {}
+        # (frozenset of terms, levels) -> search results over logs_cache
+        self._search_cache = LRUCache(maxsize=SEARCH_CACHE_SIZE)
+        # Worker processes for large scans, started on first use and kept (see _scan_pool)
+        self._pool = None
+        self._pool_lock = threading.Lock()
         self._load_all_logs()
     
     def _load_all_logs(self):
-        """Load all log files into memory"""
-        for service_name, file_path in self.log_files.items():
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.logs_cache[service_name] = f.readlines()
-                print(f"✓ Loaded {service_name}: {len(self.logs_cache[service_name])} lines")
-            except Exception as e:
-                print(f"✗ Failed to load {service_name}: {str(e)}")
-                self.logs_cache[service_name] = []
+        """Load all log files concurrently (memory-mapped where possible, see open_lines)"""
+        self._search_cache.clear()
+        if not self.log_files:
+            return
+        # File reads and UTF-8 validation are I/O-bound, so threads can overlap them
+        with ThreadPoolExecutor(max_workers=len(self.log_files)) as executor:
+            loaded = list(executor.map(self._read_one, self.log_files.values()))
+        
+        for service_name, (log_lines, error) in zip(self.log_files, loaded):
+            if error is None:
+                print(f"✓ Loaded {service_name}: {len(log_lines)} lines")
+            else:
+                print(f"✗ Failed to load {service_name}: {str(error)}")
+            self.logs_cache[service_name] = log_lines
+    
+    @staticmethod
+    def _read_one(file_path: Path) -> Tuple[List[str], Optional[Exception]]:
+        """
+        Load one log file
+        
+        Args:
+            file_path: Log file to read
+            
+        Returns:
+            (lines, None), or ([], error) if the file couldn't be read
+        """
+        try:
+            return open_lines(file_path), None
+        except Exception as e:
+            return [], e
     
-    def search_logs(self, search_terms: List[str]) -> Dict[str, List[Dict]]:
+    def search_logs(self, search_terms: List[str], include_raw: bool = False) -> Dict[str, List[Dict]]:
         """
         Search all logs for specific terms
         
         Args:
             search_terms: List of terms to search for (container numbers, vessel names, etc.)
+            include_raw: Also return each entry's stripped source line as 'raw'
             
         Returns:
             Dictionary mapping service names to matching log entries
         """
-        results = {}
+        return self._as_dicts(self._search_entries(search_terms), include_raw)
+    
+    def iter_matches(self, search_terms: List[str]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Lazily yield matching log entries, for callers that may stop early
         
-        for service_name, log_lines in self.logs_cache.items():
-            matches = []
-            
-            for line_num, line in enumerate(log_lines, 1):
-                # Check if any search term is in this line
-                if any(term in line for term in search_terms):
-                    parsed_entry = self._parse_log_line(line, line_num)
-                    if parsed_entry:
-                        matches.append(parsed_entry)
+        Yields the same entries as search_logs, service by service in file
+        order. Lines are only parsed as they are consumed unless the search
+        is already cached. Streamed results are not cached.
+        
+        Args:
+            search_terms: List of terms to search for
             
-            if matches:
-                results[service_name] = matches
+        Yields:
+            (service name, log entry) pairs
+        """
+        cached = self._search_cache.get((frozenset(search_terms), None))
+        if cached is not None:
+            for service_name, entries in cached.items():
+                for entry in entries:
+                    yield service_name, _to_dict(entry)
+            return
+        
+        for service_name, log_lines in self.logs_cache.items():
+            for line_num, line in _lines_with_terms(log_lines, search_terms):
+                yield service_name, _to_dict(_parse_line(line, line_num))
+    
+    def _as_dicts(self, results: Dict[str, List[Tuple]], include_raw: bool = False) -> Dict[str, List[Dict]]:
+        """Entry tuples from _search_entries as the public list-of-dicts form"""
+        if not include_raw:
+            return {service: [_to_dict(entry) for entry in entries] for service, entries in results.items()}
+        # Raw lines are re-read from the loaded logs rather than kept with every entry
+        return {
+            service: [_to_dict(entry, raw=self.logs_cache[service][entry[0] - 1].strip()) for entry in entries]
+            for service, entries in results.items()
+        }
+    
+    def _search_entries(self, search_terms: List[str],
+                        levels: Optional[Tuple[str, ...]] = None) -> Dict[str, List[Tuple]]:
+        """
+        Search all logs, optionally keeping only entries at the given levels
+        
+        A line can only parse to a level whose name it contains, so when
+        levels are given, lines without any of them are skipped unparsed.
+        Results are memoised per set of terms and shared between callers,
+        which must not modify the lists.
         
+        Args:
+            search_terms: List of terms to search for
+            levels: Log levels to keep (all levels if omitted)
+            
+        Returns:
+            Dictionary mapping service names to matching _ENTRY_FIELDS tuples
+        """
+        # Lines match if they contain any term, so order and repeats don't matter
+        key = (frozenset(search_terms), levels)
+        results = self._search_cache.get(key)
+        if results is None:
+            results = self._scan_lines(search_terms, levels)
+            self._search_cache[key] = results
         return results
     
+    def _scan_lines(self, search_terms: List[str],
+                    levels: Optional[Tuple[str, ...]]) -> Dict[str, List[Tuple]]:
+        """Uncached line scan behind _search_logs"""
+        # Only mapped logs go to the workers: they pickle as a path to re-map,
+        # where a list of lines would be copied to the worker on every search
+        mapped = {
+            service_name: log_lines for service_name, log_lines in self.logs_cache.items()
+            if isinstance(log_lines, MappedLines)
+        }
+        futures = {}
+        if sum(len(log_lines) for log_lines in mapped.values()) >= PARALLEL_SCAN_MIN_LINES:
+            try:
+                pool = self._scan_pool()
+                futures = {
+                    service_name: pool.submit(_scan_service, log_lines, search_terms, levels)
+                    for service_name, log_lines in mapped.items()
+                }
+            except BrokenProcessPool:
+                self.close()
+                futures = {}
+        
+        # The rest are scanned here while the workers run
+        scanned = {
+            service_name: _scan_service(log_lines, search_terms, levels)
+            for service_name, log_lines in self.logs_cache.items()
+            if service_name not in futures
+        }
+        for service_name, future in futures.items():
+            try:
+                scanned[service_name] = future.result()
+            except BrokenProcessPool:
+                self.close()
+                scanned[service_name] = _scan_service(mapped[service_name], search_terms, levels)
+        
+        return {service_name: scanned[service_name] for service_name in self.logs_cache if scanned[service_name]}
+    
+    def _scan_pool(self) -> ProcessPoolExecutor:
+        """Long-lived worker pool for _scan_lines, started on first use"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=min(len(self.logs_cache), os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context(_POOL_START_METHOD)
+                )
+            return self._pool
+    
+    def close(self):
+        """Shut down the scan worker processes, if any (a later scan starts new ones)"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
     def _parse_log_line(self, line: str, line_num: int) -> Optional[Dict]:
         """
         Parse a single log line into structured format
@@ -71,35 +405,7 @@ class ApplicationLogParser:
         Returns:
             Parsed log entry or None
         """
-        # Log format: 2025-10-09T08:25:33.050Z INFO api-event-service Boot version=1.0.0
-        
-        # Extract timestamp
-        timestamp_match = re.match(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z)', line)
-        timestamp = timestamp_match.group(1) if timestamp_match else None
-        
-        # Extract log level
-        level_match = re.search(r'\s(DEBUG|INFO|WARN|ERROR)\s', line)
-        level = level_match.group(1) if level_match else 'UNKNOWN'
-        
-        # Extract service name (component)
-        service_match = re.search(r'(INFO|ERROR|WARN|DEBUG)\s+(\S+)\s', line)
-        component = service_match.group(2) if service_match else 'unknown'
-        
-        # Extract message (everything after the component)
-        if service_match:
-            message_start = service_match.end()
-            message = line[message_start:].strip()
-        else:
-            message = line.strip()
-        
-        return {
-            'line_num': line_num,
-            'timestamp': timestamp,
-            'level': level,
-            'component': component,
-            'message': message,
-            'raw': line.strip()
-        }
+        return _to_dict(_parse_line(line, line_num), raw=line.strip())
     
     def get_errors_only(self, search_terms: List[str]) -> Dict[str, List[Dict]]:
         """
@@ -111,16 +417,7 @@ class ApplicationLogParser:
         Returns:
             Dictionary of error logs by service
         """
-        all_results = self.search_logs(search_terms)
-        
-        # Filter only errors
-        errors = {}
-        for service, entries in all_results.items():
-            error_entries = [e for e in entries if e['level'] == 'ERROR']
-            if error_entries:
-                errors[service] = error_entries
-        
-        return errors
+        return self._as_dicts(self._search_entries(search_terms, levels=('ERROR',)))
     
     def get_warnings_only(self, search_terms: List[str]) -> Dict[str, List[Dict]]:
         """
@@ -132,16 +429,7 @@ class ApplicationLogParser:
         Returns:
             Dictionary of warning logs by service
         """
-        all_results = self.search_logs(search_terms)
-        
-        # Filter only warnings
-        warnings = {}
-        for service, entries in all_results.items():
-            warn_entries = [e for e in entries if e['level'] == 'WARN']
-            if warn_entries:
-                warnings[service] = warn_entries
-        
-        return warnings
+        return self._as_dicts(self._search_entries(search_terms, levels=('WARN',)))
     
     def build_timeline(self, search_terms: List[str]) -> List[Dict]:
         """
@@ -153,14 +441,13 @@ class ApplicationLogParser:
         Returns:
             Sorted list of log entries by timestamp
         """
-        all_results = self.search_logs(search_terms)
+        all_results = self._search_entries(search_terms)
         
         # Flatten all entries
         timeline = []
         for service, entries in all_results.items():
             for entry in entries:
-                entry['service'] = service
-                timeline.append(entry)
+                timeline.append(_to_dict(entry, service=service))
         
         # Sort by timestamp
         timeline.sort(key=lambda x: x['timestamp'] if x['timestamp'] else '')
@@ -177,8 +464,14 @@ class ApplicationLogParser:
         Returns:
             List of affected service names
         """
-        results = self.search_logs(search_terms)
-        return list(results.keys())
+        results = self._search_cache.get((frozenset(search_terms), None))
+        if results is not None:
+            return list(results.keys())
+        # Only whether each service has a matching line matters, so stop at its first one
+        return [
+            service_name for service_name, log_lines in self.logs_cache.items()
+            if next(_lines_with_terms(log_lines, search_terms), None) is not None
+        ]
     
     def analyze_patterns(self, search_terms: List[str]) -> Dict:
         """
@@ -190,37 +483,74 @@ class ApplicationLogParser:
         Returns:
             Dictionary with analysis results
         """
-        results = self.search_logs(search_terms)
-        
-        total_entries = sum(len(entries) for entries in results.values())
+        return self._analyze_results(self._search_entries(search_terms))
+    
+    def _analyze_results(self, results: Dict[str, List[Tuple]]) -> Dict:
+        """Pattern analysis over already-searched results (see analyze_patterns)"""
+        all_entries = [entry for entries in results.values() for entry in entries]
+        total_entries = len(all_entries)
         
         # Count by level
-        level_counts = {}
-        for entries in results.values():
-            for entry in entries:
-                level = entry['level']
-                level_counts[level] = level_counts.get(level, 0) + 1
+        level_counts = dict(Counter(map(itemgetter(_LEVEL), all_entries)))
         
         # Count by service
         service_counts = {service: len(entries) for service, entries in results.items()}
         
-        # Get error messages
-        error_messages = []
-        for entries in results.values():
-            for entry in entries:
-                if entry['level'] == 'ERROR':
-                    error_messages.append(entry['message'])
+        # Count error messages (Counter keeps first-seen order, like dict.fromkeys)
+        error_counts = Counter(entry[_MESSAGE] for entry in all_entries if entry[_LEVEL] == 'ERROR')
         
         return {
             'total_entries': total_entries,
             'affected_services': list(results.keys()),
             'level_counts': level_counts,
             'service_counts': service_counts,
-            'unique_errors': list(set(error_messages)),
+            'unique_errors': list(error_counts),  # First-seen order
+            'top_errors': error_counts.most_common(5),  # (message, count), most frequent first
             'error_count': level_counts.get('ERROR', 0),
             'warning_count': level_counts.get('WARN', 0)
         }
     
+    def scan(self, search_terms: List[str]) -> Dict:
+        """
+        Search once and derive every view ContextGatherer needs
+        
+        Equivalent to calling search_logs, get_errors_only, get_warnings_only,
+        build_timeline, get_affected_services and analyze_patterns, but the
+        logs are only searched a single time.
+        
+        Args:
+            search_terms: Terms to search for
+            
+        Returns:
+            Dictionary with results, errors, warnings, timeline,
+            affected_services and analysis
+        """
+        found = self._search_entries(search_terms)
+        results = self._as_dicts(found)
+        
+        errors = {}
+        warnings = {}
+        timeline = []
+        for service, entries in results.items():
+            for entry in entries:
+                if entry['level'] == 'ERROR':
+                    errors.setdefault(service, []).append(entry)
+                elif entry['level'] == 'WARN':
+                    warnings.setdefault(service, []).append(entry)
+                # Timeline entries carry their service; results entries don't
+                timeline.append({**entry, 'service': service})
+        
+        timeline.sort(key=lambda x: x['timestamp'] if x['timestamp'] else '')
+        
+        return {
+            'results': results,
+            'errors': errors,
+            'warnings': warnings,
+            'timeline': timeline,
+            'affected_services': list(results.keys()),
+            'analysis': self._analyze_results(found)
+        }
+    
     def extract_entities(self, search_terms: List[str]) -> Dict[str, List[str]]:
         """
         Extract entities (container numbers, vessel names, etc.) from logs
@@ -231,7 +561,7 @@ class ApplicationLogParser:
         Returns:
             Dictionary of entity types to values found
         """
-        results = self.search_logs(search_terms)
+        results = self._search_entries(search_terms)
         
         entities = {
             'containers': set(),
@@ -242,23 +572,25 @@ class ApplicationLogParser:
         
         for entries in results.values():
             for entry in entries:
-                message = entry['message']
+                message = entry[_MESSAGE]
                 
                 # Extract container numbers (format: XXXX1234567)
-                container_matches = re.findall(r'\b[A-Z]{4}\d{7}\b', message)
-                entities['containers'].update(container_matches)
+                entities['containers'].update(_CONTAINER_RE.findall(message))
+                
+                # The remaining patterns contain a fixed literal, so messages
+                # without it are not scanned at all
                 
                 # Extract vessel names (format: MV VESSEL NAME)
-                vessel_matches = re.findall(r'MV\s+[A-Z\s]+(?:/\d+[A-Z]?)?', message)
-                entities['vessels'].update(vessel_matches)
+                if 'MV' in message:
+                    entities['vessels'].update(_VESSEL_RE.findall(message))
                 
                 # Extract error codes
-                error_matches = re.findall(r'[A-Z]+_ERR_\d+', message)
-                entities['error_codes'].update(error_matches)
+                if '_ERR_' in message:
+                    entities['error_codes'].update(_ERROR_CODE_RE.findall(message))
                 
                 # Extract reference IDs
-                ref_matches = re.findall(r'REF-[A-Z]+-[^\s]+', message)
-                entities['reference_ids'].update(ref_matches)
+                if 'REF-' in message:
+                    entities['reference_ids'].update(_REFERENCE_RE.findall(message))
         
         # Convert sets to lists
         return {k: list(v) for k, v in entities.items()}
@@ -272,27 +604,34 @@ class ApplicationLogParser:
             context_lines: Number of lines before/after to include
             
         Returns:
-            Dictionary with errors and their context
+            Dictionary with errors and their context (a line shared by
+            overlapping windows is the same entry dict in each)
         """
         results_with_context = {}
         
         for service_name, log_lines in self.logs_cache.items():
             errors_with_context = []
+            # Windows of nearby errors overlap, so each line is parsed at most once
+            parsed = {}
+            
+            def entry_at(index: int) -> Dict:
+                if index not in parsed:
+                    parsed[index] = self._parse_log_line(log_lines[index], index + 1)
+                return parsed[index]
             
-            for line_num, line in enumerate(log_lines, 1):
-                # Check if this is an error line matching search terms
-                if 'ERROR' in line and any(term in line for term in search_terms):
-                    # Get context
-                    start = max(0, line_num - context_lines - 1)
-                    end = min(len(log_lines), line_num + context_lines)
-                    
-                    context = {
-                        'error_line': self._parse_log_line(line, line_num),
-                        'before': [self._parse_log_line(log_lines[i], i+1) for i in range(start, line_num-1)],
-                        'after': [self._parse_log_line(log_lines[i], i+1) for i in range(line_num, end)]
-                    }
-                    
-                    errors_with_context.append(context)
+            # Error lines matching search terms (contain 'ERROR' and a term)
+            for line_num, line in _lines_with_terms(log_lines, search_terms, ('ERROR',)):
+                # Get context
+                start = max(0, line_num - context_lines - 1)
+                end = min(len(log_lines), line_num + context_lines)
+                
+                context = {
+                    'error_line': entry_at(line_num - 1),
+                    'before': [entry_at(i) for i in range(start, line_num-1)],
+                    'after': [entry_at(i) for i in range(line_num, end)]
+                }
+                
+                errors_with_context.append(context)
             
             if errors_with_context:
                 results_with_context[service_name] = errors_with_context
@@ -322,6 +661,9 @@ class ApplicationLogParser:
             Formatted summary string
         """
         analysis = self.analyze_patterns(search_terms)
+        service_lines = '\n'.join(
+            f"- {service}: {count} entries" for service, count in analysis['service_counts'].items()
+        )
         
         summary = f"""
 Log Search Summary
@@ -338,12 +680,11 @@ Log Levels:
 - DEBUG: {analysis['level_counts'].get('DEBUG', 0)}
 
 Service Breakdown:
-{chr(10).join(f"- {service}: {count} entries" for service, count in analysis['service_counts'].items())}
+{service_lines}
 """
         
-        if analysis['unique_errors']:
-            summary += f"\n\nUnique Error Messages:\n"
-            for i, error in enumerate(analysis['unique_errors'][:5], 1):
-                summary += f"{i}. {error}\n"
+        if analysis['top_errors']:
+            error_lines = [f"{i}. {error} ({count}x)\n" for i, (error, count) in enumerate(analysis['top_errors'], 1)]
+            summary += "\n\nUnique Error Messages (most frequent first):\n" + ''.join(error_lines)
         
         return summary
\ No newline at end of file
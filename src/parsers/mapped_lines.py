@@ -0,0 +1,159 @@
+"""
+Memory-mapped, read-only view of a text file's lines
+"""
+import codecs
+import mmap
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+import numpy as np
+
+# Bytes decoded per step when validating a mapped file
+_CHUNK_SIZE = 1 << 20
+
+# Bytes compared per step when locating line breaks (bounds the temporary mask)
+_NEWLINE_CHUNK_SIZE = 1 << 26
+
+
+class MappedLines(Sequence):
+    """
+    Lines of a UTF-8 text file, read through mmap instead of held as strings
+    
+    Behaves like the list f.readlines() returns (len, indexing, iteration),
+    but only stores one int64 offset per line; a line is decoded when it is
+    accessed. raw_lines() yields the undecoded bytes so callers can filter
+    before paying for the decode.
+    
+    Only files with plain '\\n' line endings can be mapped; open_lines()
+    reads anything else (e.g. '\\r\\n') the normal way.
+    """
+    
+    def __init__(self, path: Path, mapped: mmap.mmap, offsets: np.ndarray):
+        """
+        Wrap an existing mapping (use open_lines() to create one)
+        
+        Args:
+            path: File the mapping belongs to
+            mapped: Read-only mapping of the whole file
+            offsets: Start offset of every line, plus the file size
+        """
+        self.path = Path(path)
+        self._mapped = mapped
+        self._offsets = offsets
+    
+    @classmethod
+    def _from_path(cls, path: Path, offsets: np.ndarray) -> 'MappedLines':
+        """Re-map a file whose line offsets are already known (used when unpickling)"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(path, mapped, offsets)
+    
+    def __reduce__(self):
+        # Worker processes re-map the file rather than receiving its contents
+        return (MappedLines._from_path, (self.path, self._offsets))
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('line index out of range')
+        return self.raw_line(index).decode('utf-8')
+    
+    def __iter__(self) -> Iterator[str]:
+        for raw in self.raw_lines():
+            yield raw.decode('utf-8')
+    
+    def lines_containing(self, terms: List[bytes]) -> List[int]:
+        """
+        Indexes of the lines that contain any of the terms
+        
+        Each term is found with mmap.find over the whole file, so lines
+        without a hit are never touched from Python.
+        
+        Args:
+            terms: Byte strings to look for; none may contain b'\n'
+        
+        Returns:
+            Sorted line indexes
+        """
+        if b'' in terms:
+            return list(range(len(self)))
+        
+        mapped = self._mapped
+        positions = []
+        for term in terms:
+            position = mapped.find(term)
+            while position != -1:
+                positions.append(position)
+                # One hit per line is enough; carry on from the next line
+                line_end = mapped.find(b'\n', position)
+                if line_end == -1:
+                    break
+                position = mapped.find(term, line_end + 1)
+        
+        # Hit offsets -> line indexes in one vectorised lookup
+        indexes = np.searchsorted(self._offsets, positions, side='right') - 1
+        return np.unique(indexes).tolist()
+    
+    def raw_line(self, index: int) -> bytes:
+        """Undecoded line at a (non-negative) index, including its b'\n'"""
+        return self._mapped[self._offsets[index]:self._offsets[index + 1]]
+    
+    def raw_lines(self) -> Iterator[bytes]:
+        """Undecoded lines, each including its trailing b'\\n' if it has one"""
+        mapped, offsets = self._mapped, self._offsets.tolist()
+        for i in range(len(offsets) - 1):
+            yield mapped[offsets[i]:offsets[i + 1]]
+
+
+def _map_file(path: Path) -> Optional[MappedLines]:
+    """Map path if it is non-empty, valid UTF-8 with '\\n' line endings, else None"""
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return None  # Empty files can't be mapped
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    if mapped.find(b'\r') != -1:
+        mapped.close()
+        return None
+    
+    # Same failure as reading the file in text mode, without keeping the text
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for start in range(0, len(mapped), _CHUNK_SIZE):
+        decoder.decode(mapped[start:start + _CHUNK_SIZE])
+    decoder.decode(b'', final=True)
+    
+    # Line starts: 0 and every byte after a b'\n', found with numpy comparisons
+    data = np.frombuffer(mapped, dtype=np.uint8)
+    starts = [np.zeros(1, dtype=np.int64)]
+    for start in range(0, len(data), _NEWLINE_CHUNK_SIZE):
+        chunk = data[start:start + _NEWLINE_CHUNK_SIZE]
+        starts.append(np.flatnonzero(chunk == 0x0A) + (start + 1))
+    del data, chunk  # Release the buffer exports so the mapping can be closed later
+    offsets = np.concatenate(starts)
+    if offsets[-1] != len(mapped):
+        offsets = np.append(offsets, len(mapped))  # Last line has no trailing newline
+    return MappedLines(path, mapped, offsets)
+
+
+def open_lines(path: Path) -> Union[MappedLines, List[str]]:
+    """
+    Lines of a UTF-8 text file, memory-mapped where possible
+    
+    Args:
+        path: File to read
+    
+    Returns:
+        A MappedLines view, or the f.readlines() list for files that can't
+        be mapped line-for-line (empty, or using '\\r' line endings)
+    """
+    lines = _map_file(path)
+    if lines is not None:
+        return lines
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.readlines()
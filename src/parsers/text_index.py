@@ -0,0 +1,68 @@
+"""
+Inverted token index for keyword search over a fixed set of documents
+"""
+import re
+from typing import Dict, List, Set
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class TokenIndex:
+    """
+    Token -> document-ids index that answers "which documents contain this
+    keyword as a substring" without scanning every document
+    
+    A substring hit can only occur in documents where each word of the
+    keyword appears inside some token, so candidates come from the posting
+    lists and are then confirmed against the lowercased text. Results are
+    the same as `keyword.lower() in text` over every document.
+    """
+    
+    def __init__(self, texts: List[str]):
+        """
+        Build the index
+        
+        Args:
+            texts: Document texts; document ids are their positions
+        """
+        self.texts = [text.lower() for text in texts]
+        self.postings: Dict[str, Set[int]] = {}
+        for doc_id, text in enumerate(self.texts):
+            for token in set(_TOKEN_RE.findall(text)):
+                self.postings.setdefault(token, set()).add(doc_id)
+        self._all_ids = set(range(len(self.texts)))
+        self._cache: Dict[str, Set[int]] = {}
+    
+    def _docs_with_fragment(self, fragment: str) -> Set[int]:
+        """Documents with a token containing fragment"""
+        exact = self.postings.get(fragment)
+        docs = set(exact) if exact else set()
+        for token, ids in self.postings.items():
+            if fragment in token and token != fragment:
+                docs |= ids
+        return docs
+    
+    def matching(self, keyword: str) -> Set[int]:
+        """
+        Ids of documents whose text contains keyword (case-insensitive)
+        
+        Args:
+            keyword: Word or phrase to look for
+        
+        Returns:
+            Set of matching document ids
+        """
+        keyword = keyword.lower()
+        if keyword in self._cache:
+            return self._cache[keyword]
+        
+        fragments = _TOKEN_RE.findall(keyword)
+        candidates = self._all_ids
+        for fragment in fragments:
+            candidates = candidates & self._docs_with_fragment(fragment)
+            if not candidates:
+                break
+        
+        matches = {doc_id for doc_id in candidates if keyword in self.texts[doc_id]}
+        self._cache[keyword] = matches
+        return matches
@@ -11,9 +11,17 @@ from .config import (
     LOG_FILES,
     DB_SCHEMA_FILE,
     AZURE_OPENAI_CONFIG,
+    OPENAI_FALLBACK_CONFIG,
+    AI_CONTEXT_TOKEN_BUDGET,
+    SEARCH_TERM_LIMIT,
+    ENABLE_CAG_SHORTCUT,
+    CAG_SIMILARITY_THRESHOLD,
+    CAG_MIN_MATCHED_KEYWORDS,
+    ENABLE_TFIDF_CASE_SEARCH,
     validate_files,
     validate_azure_config
 )
+from .cache import ResponseCache, SemanticCache
 
 __all__ = [
     'PROJECT_ROOT',
@@ -25,6 +33,15 @@ __all__ = [
     'LOG_FILES',
     'DB_SCHEMA_FILE',
     'AZURE_OPENAI_CONFIG',
+    'OPENAI_FALLBACK_CONFIG',
+    'AI_CONTEXT_TOKEN_BUDGET',
+    'SEARCH_TERM_LIMIT',
+    'ENABLE_CAG_SHORTCUT',
+    'CAG_SIMILARITY_THRESHOLD',
+    'CAG_MIN_MATCHED_KEYWORDS',
+    'ENABLE_TFIDF_CASE_SEARCH',
     'validate_files',
-    'validate_azure_config'
+    'validate_azure_config',
+    'ResponseCache',
+    'SemanticCache'
 ]
\ No newline at end of file
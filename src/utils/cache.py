@@ -0,0 +1,346 @@
+"""
+Response caches for AI calls, in memory and optionally persisted to disk
+"""
+import hashlib
+import logging
+import shelve
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from cachetools import TLRUCache
+
+try:
+    import faiss
+except ImportError:  # optional dependency
+    faiss = None
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Below this many entries a numpy matrix product beats building a FAISS index
+FAISS_MIN_ENTRIES = 1000
+
+# Entries kept in a ResponseCache's shelve file before the soonest-expiring are dropped
+DISK_CACHE_MAX_ENTRIES = 4096
+
+
+class _DiskStore:
+    """
+    One process's handle on a shelve file of (value, expires_at) entries
+
+    The file is opened once and shared by every ResponseCache using the same
+    path (see open()). dbm isn't safe with several writers, so an exclusive
+    lock file claims it for this process; other processes run memory-only.
+    """
+
+    # Resolved path -> open store, or None if it couldn't be opened
+    _stores: Dict[Path, Optional['_DiskStore']] = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, path: Path, max_entries: int):
+        """
+        Open the shelve file at path (use open() to share one per process)
+
+        Args:
+            path: Shelve file to open
+            max_entries: Entries kept before the soonest-expiring are dropped
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._lock_file = open(f"{path}.lock", 'a')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._shelf = shelve.open(str(path))
+        except Exception:
+            self._lock_file.close()
+            raise
+        weakref.finalize(self, self._close, self._shelf, self._lock_file)
+
+    @classmethod
+    def open(cls, path: Path, max_entries: int) -> Optional['_DiskStore']:
+        """The shared store for path, or None if it can't be used by this process"""
+        path = path.resolve()
+        with cls._stores_lock:
+            if path not in cls._stores:
+                try:
+                    cls._stores[path] = cls(path, max_entries)
+                except Exception as e:
+                    logger.debug("Response cache file %s unavailable, caching in memory only: %s", path, e)
+                    cls._stores[path] = None
+            return cls._stores[path]
+
+    @staticmethod
+    def _close(shelf, lock_file):
+        """Flush the shelf and release the lock file (at exit)"""
+        shelf.close()
+        lock_file.close()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, seconds left) for key, deleting it if it has expired"""
+        with self._lock:
+            try:
+                stored = self._shelf.get(key)
+                if stored is None:
+                    return None
+                value, expires_at = stored
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    del self._shelf[key]
+                    return None
+                return value, remaining
+            except Exception as e:
+                logger.debug("Response cache read failed for %s: %s", self.path, e)
+                return None
+
+    def set(self, key: str, value: Any, expires_at: float):
+        """Store value until the wall-clock time expires_at"""
+        with self._lock:
+            try:
+                self._shelf[key] = (value, expires_at)
+                if len(self._shelf) > self.max_entries:
+                    self._prune()
+            except Exception as e:
+                logger.debug("Response cache write failed for %s: %s", self.path, e)
+
+    def _prune(self):
+        """Drop expired entries, then the soonest-expiring, down to 90% of max_entries (lock held)"""
+        now = time.time()
+        expiry = {key: self._shelf[key][1] for key in list(self._shelf.keys())}
+        keep = int(self.max_entries * 0.9)
+        for key in sorted(expiry, key=expiry.get):
+            if expiry[key] > now and len(self._shelf) <= keep:
+                break
+            del self._shelf[key]
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL and hit/miss counters
+
+    Given a path, entries are also written to a shelve file there, so a new
+    process (e.g. the next test run) can serve identical requests without
+    calling the AI again. The file is only used by one process at a time.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, path: Optional[Path] = None,
+                 max_disk_entries: int = DISK_CACHE_MAX_ENTRIES):
+        """
+        Initialize cache
+
+        Args:
+            maxsize: Maximum number of entries kept (least recently used are evicted)
+            ttl: Default time-to-live in seconds for entries stored without one
+            path: Shelve file that persists entries across processes (None = memory only)
+            max_disk_entries: Maximum number of entries kept in the shelve file
+        """
+        self.default_ttl = ttl
+        # Values are stored as (value, ttl) so each entry can expire on its own schedule
+        self._cache = TLRUCache(maxsize=maxsize, ttu=lambda key, value, now: now + value[1])
+        self._lock = threading.Lock()
+        self.path = Path(path) if path is not None else None
+        self._disk = None
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._disk = _DiskStore.open(self.path, max_disk_entries)
+            except OSError as e:
+                logger.debug("Response cache directory %s unavailable: %s", self.path.parent, e)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a SHA-256 cache key from the given parts"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\x1f')
+        return digest.hexdigest()
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key from make_key()
+            count_miss: False for an early check that is looked up again on a miss
+
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+
+        # Disk reads happen outside the memory lock (the store has its own)
+        stored = self._disk.get(key) if self._disk is not None else None
+        with self._lock:
+            if stored is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            value, remaining = stored
+            self._cache[key] = (value, remaining)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, expiring after ttl seconds (default TTL if omitted)"""
+        ttl = ttl if ttl is not None else self.default_ttl
+        with self._lock:
+            self._cache[key] = (value, ttl)
+        if self._disk is not None:
+            # Wall-clock expiry, since monotonic time doesn't carry across processes
+            self._disk.set(key, value, time.time() + ttl)
+
+    def clear(self):
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._cache)
+            }
+
+
+class SemanticCache:
+    """
+    Thread-safe cache looked up by embedding similarity instead of exact key
+    
+    Embeddings are L2-normalised, so the inner product is the cosine
+    similarity. Lookups use a numpy matrix product, or a FAISS IndexFlatIP
+    once the cache holds FAISS_MIN_ENTRIES entries and faiss is installed.
+    """
+    
+    def __init__(self, maxsize: int = 2048, threshold: float = 0.95, ttl: float = 3600):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Maximum number of entries kept (oldest are evicted first)
+            threshold: Minimum cosine similarity for a hit
+            ttl: Default time-to-live in seconds for entries stored without one
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.default_ttl = ttl
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[tuple] = []  # (value, expires_at), row-aligned with _vectors
+        self._index = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Embedding as a unit-length float32 row vector"""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def get(self, embedding: Sequence[float]) -> Optional[Any]:
+        """
+        Look up the value stored for the most similar embedding
+        
+        Returns:
+            The cached value, or None if nothing is similar enough or it expired
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or query.shape[1] != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+            
+            if self._index is not None:
+                scores, rows = self._index.search(query, 1)
+                best, score = int(rows[0][0]), float(scores[0][0])
+            else:
+                sims = self._vectors @ query[0]
+                best = int(np.argmax(sims))
+                score = float(sims[best])
+            
+            value, expires_at = self._entries[best]
+            if score < self.threshold or expires_at < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+    
+    def set(self, embedding: Sequence[float], value: Any, ttl: Optional[float] = None):
+        """Store a value under an embedding, expiring after ttl seconds"""
+        vector = self._normalize(embedding)
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            if self._vectors is None or vector.shape[1] != self._vectors.shape[1]:
+                # First entry, or the embedding model changed - start over
+                self._vectors = vector
+                self._entries = [(value, expires_at)]
+                self._index = None
+                return
+            
+            self._vectors = np.vstack([self._vectors, vector])
+            self._entries.append((value, expires_at))
+            if len(self._entries) > self.maxsize:
+                self._evict()
+            elif self._index is not None:
+                self._index.add(vector)
+            else:
+                self._maybe_build_index()
+    
+    def _evict(self):
+        """Drop expired entries, then the oldest, down to 90% of maxsize (lock held)"""
+        now = time.monotonic()
+        keep = [i for i, (_, expires_at) in enumerate(self._entries) if expires_at >= now]
+        keep = keep[-int(self.maxsize * 0.9):]
+        if not keep:
+            self._vectors, self._entries, self._index = None, [], None
+            return
+        self._vectors = self._vectors[keep]
+        self._entries = [self._entries[i] for i in keep]
+        self._index = None
+        self._maybe_build_index()
+    
+    def _maybe_build_index(self):
+        """Switch lookups to FAISS once the cache is large enough (lock held)"""
+        if faiss is None or len(self._entries) < FAISS_MIN_ENTRIES:
+            return
+        self._index = faiss.IndexFlatIP(self._vectors.shape[1])
+        self._index.add(self._vectors)
+    
+    def clear(self):
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._vectors = None
+            self._entries = []
+            self._index = None
+            self.hits = 0
+            self.misses = 0
+    
+    @property
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries)
+            }
@@ -39,30 +39,81 @@ AZURE_OPENAI_CONFIG = {
     'api_key': os.getenv('AZURE_OPENAI_API_KEY'),
     'endpoint': os.getenv('AZURE_OPENAI_ENDPOINT', 'https://psacodesprint2025.azure-api.net'),
     'deployment': os.getenv('AZURE_OPENAI_DEPLOYMENT', 'gpt-4.1-nano'),
-    'api_version': os.getenv('AZURE_OPENAI_API_VERSION', '2025-01-01-preview')
+    'api_version': os.getenv('AZURE_OPENAI_API_VERSION', '2025-01-01-preview'),
+    # Incidents processed at once by AIAnalyzer.analyze_incidents_batch
+    'max_concurrency': int(os.getenv('AZURE_MAX_CONCURRENCY', '8')),
+    # Embedding deployment for the semantic response cache (unset = disabled)
+    'embedding_deployment': os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT'),
+    # Cosine similarity above which a cached analysis is reused
+    'semantic_cache_threshold': float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+}
+
+# Max tokens of gathered context (logs, cases, KB) included in AI prompts
+AI_CONTEXT_TOKEN_BUDGET = int(os.getenv('AI_CONTEXT_TOKEN_BUDGET', '1500'))
+
+# Directory where AI responses are persisted across runs (unset = in-memory only)
+RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR')
+
+# Max entity values ContextGatherer passes to the log search
+SEARCH_TERM_LIMIT = int(os.getenv('SEARCH_TERM_LIMIT', '12'))
+
+# Serve analysis/remediation from a near-identical historical case instead of the AI.
+# A handful of generic keywords (e.g. just 'cannot') scores 1.0 on keyword-fraction
+# similarity, so the case must also match CAG_MIN_MATCHED_KEYWORDS of them and
+# clearly beat the runner-up.
+ENABLE_CAG_SHORTCUT = os.getenv('ENABLE_CAG_SHORTCUT', 'false').lower() in ('1', 'true', 'yes')
+CAG_SIMILARITY_THRESHOLD = float(os.getenv('CAG_SIMILARITY_THRESHOLD', '0.92'))
+CAG_MIN_MATCHED_KEYWORDS = int(os.getenv('CAG_MIN_MATCHED_KEYWORDS', '4'))
+
+# Rank similar historical cases by TF-IDF cosine similarity (needs scikit-learn).
+# Scores are on a different scale from keyword-fraction similarity, so revisit
+# CAG_SIMILARITY_THRESHOLD when turning this on.
+ENABLE_TFIDF_CASE_SEARCH = os.getenv('ENABLE_TFIDF_CASE_SEARCH', 'false').lower() in ('1', 'true', 'yes')
+
+# Optional OpenAI fallback used when Azure keeps rate limiting / timing out
+OPENAI_FALLBACK_CONFIG = {
+    'api_key': os.getenv('OPENAI_FALLBACK_KEY'),
+    'model': os.getenv('OPENAI_FALLBACK_MODEL', 'gpt-4.1-nano')
 }
 
 # Create outputs directory if it doesn't exist
 OUTPUTS_DIR.mkdir(exist_ok=True)
 
 
+def _entry_names(directory: Path) -> set:
+    """Names in a directory from a single listing (empty if it can't be read)"""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+
 def validate_files():
     """Validate that all required files exist"""
     missing_files = []
+    # One directory listing per parent instead of a stat() per file
+    listings = {}
+    
+    def exists(path: Path) -> bool:
+        if path.parent not in listings:
+            listings[path.parent] = _entry_names(path.parent)
+        # Names not listed get a real check (case-insensitive filesystems, symlinks)
+        return path.name in listings[path.parent] or path.exists()
     
     # Check data files
-    if not CASE_LOG_FILE.exists():
+    if not exists(CASE_LOG_FILE):
         missing_files.append(str(CASE_LOG_FILE))
-    if not KNOWLEDGE_BASE_FILE.exists():
+    if not exists(KNOWLEDGE_BASE_FILE):
         missing_files.append(str(KNOWLEDGE_BASE_FILE))
-    if not ESCALATION_CONTACTS_FILE.exists():
+    if not exists(ESCALATION_CONTACTS_FILE):
         missing_files.append(str(ESCALATION_CONTACTS_FILE))
-    if not DB_SCHEMA_FILE.exists():
+    if not exists(DB_SCHEMA_FILE):
         missing_files.append(str(DB_SCHEMA_FILE))
     
     # Check log files
     for name, path in LOG_FILES.items():
-        if not path.exists():
+        if not exists(path):
             missing_files.append(f"{name}: {path}")
     
     if missing_files:
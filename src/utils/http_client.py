@@ -0,0 +1,92 @@
+"""
+Shared HTTP connection pools and event loop for AI calls
+"""
+import asyncio
+import atexit
+import threading
+from typing import Optional
+import httpx
+
+try:
+    import h2  # noqa: F401 - httpx only speaks HTTP/2 when this is installed
+except ImportError:  # optional dependency
+    h2 = None
+
+# Pool sized for asyncio.gather fan-out in batch runs
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Multiplex concurrent requests over one connection when h2 is available;
+# negotiated per server, so HTTP/1.1-only endpoints keep working
+HTTP2 = h2 is not None
+
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_sync_client: Optional[httpx.Client] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_shared_async_client() -> httpx.AsyncClient:
+    """
+    Process-wide httpx.AsyncClient, created on first use
+
+    Keep-alive connections are bound to the event loop that opened them, so
+    sync callers should go through run_sync() rather than asyncio.run().
+    """
+    global _shared_client
+    with _lock:
+        if _shared_client is None:
+            _shared_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, http2=HTTP2)
+            atexit.register(_close_shared_client)
+        return _shared_client
+
+
+def get_shared_client() -> httpx.Client:
+    """
+    Process-wide httpx.Client for the synchronous OpenAI clients, created on first use
+    
+    Every AIAnalyzer in the process (app, test scripts, batch runs) then
+    reuses the same keep-alive connections instead of opening its own.
+    """
+    global _shared_sync_client
+    with _lock:
+        if _shared_sync_client is None:
+            _shared_sync_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT, http2=HTTP2)
+            atexit.register(_shared_sync_client.close)
+        return _shared_sync_client
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Long-lived event loop running in a daemon thread"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="ai-event-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro):
+    """
+    Run a coroutine on the shared event loop and block until it finishes
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def _close_shared_client():
+    """Close pooled connections at interpreter exit"""
+    if _shared_client is None or _shared_client.is_closed:
+        return
+    try:
+        if _loop is not None and _loop.is_running():
+            asyncio.run_coroutine_threadsafe(_shared_client.aclose(), _loop).result(timeout=5)
+        else:
+            asyncio.run(_shared_client.aclose())
+    except Exception:
+        pass
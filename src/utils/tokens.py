@@ -0,0 +1,74 @@
+"""
+Token counting helpers for prompt budgeting
+
+Uses tiktoken when it is installed; otherwise falls back to the usual
+~4 characters per token estimate.
+"""
+import math
+import threading
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+# Rough characters-per-token ratio for English text without tiktoken
+CHARS_PER_TOKEN = 4
+
+_encoder = None
+_encoder_loaded = False
+_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Load the GPT-4o tokenizer once (None if tiktoken is unavailable)"""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        with _lock:
+            if not _encoder_loaded:
+                if tiktoken is not None:
+                    try:
+                        _encoder = tiktoken.encoding_for_model('gpt-4o')
+                    except Exception:
+                        # Encoding files are fetched on first use and may be unreachable
+                        _encoder = None
+                _encoder_loaded = True
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoder.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, suffix: Optional[str] = '...') -> str:
+    """
+    Cut text down to at most max_tokens tokens
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token limit
+        suffix: Appended when the text was actually cut
+
+    Returns:
+        The original text if it fits, otherwise the truncated text plus suffix
+    """
+    if not text:
+        return text
+    encoder = _get_encoder()
+    if encoder is None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return text[:max_chars] + (suffix or '')
+
+    tokens = encoder.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoder.decode(tokens[:max_tokens]) + (suffix or '')
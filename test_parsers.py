@@ -171,7 +171,7 @@ def test_application_log_parser():
     print_header("TEST 5: Application Log Parser")
     
     try:
-        parser = ApplicationLogParser(LOG_FILES)
+        parser = ApplicationLogParser.get_or_create(LOG_FILES)
         
         print(f"✅ Loaded {len(parser.logs_cache)} log files")
         
@@ -200,6 +200,19 @@ def test_application_log_parser():
         print(f"   Error count: {analysis['error_count']}")
         print(f"   Warning count: {analysis['warning_count']}")
         
+        # Single-pass scan must agree with the individual queries
+        print("\n🔁 Testing single-pass scan...")
+        scan = parser.scan(['ERROR'])
+        assert scan['analysis']['total_entries'] == analysis['total_entries']
+        assert scan['affected_services'] == parser.get_affected_services(['ERROR'])
+        assert len(scan['timeline']) == len(parser.build_timeline(['ERROR']))
+        print(f"   Scan matches: {len(scan['timeline'])} timeline entries, {len(scan['errors'])} services with errors")
+        
+        # Streaming iteration yields the same entries as the full search
+        streamed = list(parser.iter_matches(['ERROR']))
+        assert streamed == [(service, entry) for service, entries in results.items() for entry in entries]
+        print(f"   Streamed matches: {len(streamed)} entries")
+        
         return True
         
     except Exception as e:
@@ -218,7 +231,7 @@ def test_search_scenario():
         print("🎯 Scenario: Searching for container 'CMAU0000020'")
         
         # Search logs
-        log_parser = ApplicationLogParser(LOG_FILES)
+        log_parser = ApplicationLogParser.get_or_create(LOG_FILES)
         log_results = log_parser.search_logs(['CMAU0000020'])
         
         if log_results: